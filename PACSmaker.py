@@ -1,506 +1,2645 @@
-import openpyxl
-import pandas as pd
-import folium
-import base64
-import os
-from folium.plugins import Draw, LocateControl, MeasureControl
-import datetime
-import requests
-import sys
-import re
-from github import Github
-
-CURRENT_VERSION = "2.0.6"
-UPDATE_DATE = "2025-05-22"
-GITHUB_RAW_URL = "https://raw.githubusercontent.com/come6433/q8r2x7v1p0/main/PACSmaker.py"
-REPO_NAME = 'come6433/q8r2x7v1p0'
-FILENAME = "PACS.html"
-IMAGES_DIR = 'images'
-
-def get_version_from_text(text):
-    m = re.search(r'CURRENT_VERSION\s*=\s*["\']([\d\.]+)["\']', text)
-    return m.group(1) if m else None
-
-def normalize_version(v):
-    parts = v.split(".")
-    if len(parts) == 2 and parts[1].endswith("0"):
-        parts[1] = parts[1].rstrip("0")
-        if parts[1] == "":
-            parts[1] = "0"
-    return tuple(map(int, parts))
-
-def version_compare(a, b):
-    na = normalize_version(a)
-    nb = normalize_version(b)
-    return (na > nb) - (na < nb)
-
-def check_and_update():
-    try:
-        print("업데이트 확인 중 ...")
-        r = requests.get(GITHUB_RAW_URL, timeout=5)
-        if r.status_code == 200:
-            remote_text = r.text
-            remote_version = get_version_from_text(remote_text)
-            if remote_version and version_compare(remote_version, CURRENT_VERSION) > 0:
-                print(f"\n새 버전({remote_version})이 있습니다. 자동 업데이트를 진행합니다.")
-                try:
-                    os.rename(__file__, __file__ + ".bak")
-                except Exception:
-                    pass
-                with open(__file__, "w", encoding="utf-8") as f:
-                    f.write(remote_text)
-                print("업데이트 완료! 프로그램을 다시 실행해 주세요.")
-                sys.exit(0)
-            else:
-                print("최신 버전입니다.")
-        else:
-            print("업데이트 서버 연결 실패:", r.status_code)
-    except Exception as e:
-        print("업데이트 확인 중 오류:", e)
-
-def print_intro():
-    print("=" * 40)
-    print("      PACS 저상게시대 지도 생성기")
-    print("=" * 40)
-    print("버전:        ", CURRENT_VERSION)
-    print("업데이트:    ", UPDATE_DATE)
-    print("- 변경예정 마커색깔 변경 : 보라색")
-    print("- 마커번호 불일치 변경")
-    print("=" * 40)
-
-def read_excel(filename):
-    print("관리목록.xlsx 파일을 읽는 중...\n")
-    wb = openpyxl.load_workbook(filename, data_only=True)
-    ws = wb.active
-    data = [row for row in ws.iter_rows(min_row=3, values_only=True)]
-    df = pd.DataFrame(data)
-    col_names = [cell.value for cell in ws[2]]
-    df.columns = col_names
-    df = df.dropna(subset=['설치장소', '관리번호', '위도', '경도'])
-    return df
-
-def image_to_base64(path):
-    with open(path, "rb") as f:
-        data = f.read()
-    return base64.b64encode(data).decode()
-
-def get_color(단수, marker_no):
-    marker_no_str = str(marker_no)
-    if marker_no_str.startswith('설치예정'):
-        return 'yellow'  # 노란색
-    if marker_no_str.startswith('철거예정'):
-        return '#ff9800'  # orange
-    if marker_no_str.startswith('변경예정'):
-        return '#a259e6'  # 보라색 (purple)
-    try:
-        if int(단수) == 1:
-            return 'blue'
-        else:
-            return 'red'
-    except Exception:
-        return 'blue'
-
-def get_marker_text_color(bg_color):
-    # 밝은 배경은 검정, 어두운 배경은 흰색
-    if bg_color in ['red', 'blue', '#00bcd4', '#a259e6', '#ff9800']:
-        return 'white'
-    if bg_color in ['yellow', 'pink']:
-        return 'black'
-    return 'black'
-
-def make_popup_html(group, df):
-    first = group.iloc[0]
-    설치장소 = first['설치장소'] if '설치장소' in group.columns else ""
-    popup_html = f"<div style='text-align:center;'><b class='popup-title'>{설치장소}</b><br>"
-    popup_html += "<table style='border-collapse:collapse; width:auto; margin:8px auto 0 auto;'><tr>"
-    for _, row in group.iterrows():
-        관리번호 = str(row['관리번호'])
-        image_path = f"{IMAGES_DIR}/{관리번호}.jpg"
-        if os.path.exists(image_path):
-            img_base64 = image_to_base64(image_path)
-            popup_html += (
-                f"<td style='padding:4px 8px; text-align:center;'>"
-                f"<img src='data:image/jpeg;base64,{img_base64}' width='120' class='popup-img' "
-                "style='cursor:zoom-in;display:block;margin:0 auto;'><br>"
-                f"<span style='font-weight:bold'>{관리번호}</span></td>"
-            )
-        else:
-            popup_html += (
-                f"<td style='padding:4px 8px; text-align:center;'>"
-                f"<div style='width:120px;height:90px;background:#eee;display:flex;align-items:center;justify-content:center;'>이미지 없음</div>"
-                f"<br><span style='font-weight:bold'>{관리번호}</span></td>"
-            )
-    popup_html += "</tr></table>"
-    col_count = group.shape[0]
-    min_width = 120 * col_count
-    popup_html += f"<table style='border-collapse:collapse; width:auto; min-width:{min_width}px; margin:8px auto 0 auto;'>"
-    popup_html += "<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>관리번호</td>"
-    for _, row in group.iterrows():
-        popup_html += f"<td style='border:1px solid #000; padding:4px 8px; background:#e3f2fd; font-weight:bold;'>{row['관리번호']}</td>"
-    popup_html += "</tr>"
-    exclude_cols = ['마커번호', '관리번호', '위도', '경도', '설치장소', '단수', '순번']
-    # Z칼럼 이후(AA~)는 무시
-    max_col_index = 25  # 0부터 시작(Z=25)
-    for idx, col in enumerate(df.columns):
-        if col in exclude_cols:
-            continue
-        if idx > max_col_index:
-            break
-        popup_html += f"<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>{col}</td>"
-        for _, row in group.iterrows():
-            val = row[col] if pd.notnull(row[col]) else ""
-            if isinstance(val, str):
-                val = val.replace('\r\n', '<br>').replace('\n', '<br>')
-            popup_html += f"<td style='border:1px solid #000; padding:4px 8px;'>{val}</td>"
-        popup_html += "</tr>"
-    popup_html += "</table><br></div>"
-    return popup_html
-
-def add_markers_to_map(m, df):
-    fg1 = folium.FeatureGroup(name='1단 (파랑)').add_to(m)
-    fg2 = folium.FeatureGroup(name='2단 (빨강)').add_to(m)
-    fg_install = folium.FeatureGroup(name='설치예정(청록)').add_to(m)
-    fg_remove = folium.FeatureGroup(name='철거예정(주황)').add_to(m)
-    fg_change = folium.FeatureGroup(name='변경예정(보라)').add_to(m)
-
-    grouped = df.groupby('마커번호')
-    for marker_no, group in grouped:
-        first = group.iloc[0]
-        lat, lon = first['위도'], first['경도']
-        marker_no_str = str(marker_no)
-        if marker_no_str.startswith('설치예정'):
-            # 숫자만 추출
-            num = re.sub(r'\D', '', marker_no_str)
-            marker_label = f"설{num}" if num else "설"
-            단수 = 1
-        elif marker_no_str.startswith('철거예정'):
-            num = re.sub(r'\D', '', marker_no_str)
-            marker_label = f"철{num}" if num else "철"
-            단수 = 1
-        elif marker_no_str.startswith('변경예정'):
-            num = re.sub(r'\D', '', marker_no_str)
-            marker_label = f"변{num}" if num else "변"
-            단수 = 1
-        else:
-            marker_label = marker_no_str
-            단수 = first['단수'] if pd.notnull(first['단수']) else 1
-
-        # 마커 라벨 길이에 따라 원 크기와 폰트 크기 자동 조정
-        label_len = len(marker_label)
-        if label_len <= 2:
-            size = 24
-            font_size = 12
-        elif label_len == 3:
-            size = 28
-            font_size = 12
-        elif label_len == 4:
-            size = 32
-            font_size = 11
-        else:
-            size = 36
-            font_size = 10
-
-        popup_html = make_popup_html(group, df)
-        bg_color = get_color(단수, marker_no)
-        text_color = get_marker_text_color(bg_color)
-        icon_html = (
-            f"""<div style="background-color:{bg_color};color:{text_color};border-radius:50%;text-align:center;"""
-            f"""width:{size}px;height:{size}px;line-height:{size}px;font-size:{font_size}px;border:1.5px solid #888;overflow:hidden;white-space:nowrap;">{marker_label}</div>"""
-        )
-        marker = folium.Marker(
-            location=[lat, lon],
-            icon=folium.DivIcon(html=icon_html),
-            popup=folium.Popup(popup_html, max_width=250)
-        )
-        if marker_no_str.startswith('설치예정'):
-            fg_install.add_child(marker)
-        elif marker_no_str.startswith('철거예정'):
-            fg_remove.add_child(marker)
-        elif marker_no_str.startswith('변경예정'):
-            fg_change.add_child(marker)
-        elif int(단수) == 1:
-            fg1.add_child(marker)
-        else:
-            fg2.add_child(marker)
-    return fg1, fg2, fg_install, fg_remove, fg_change
-
-def add_generated_time(m):
-    now = datetime.datetime.now()
-    time_str = f"작성시점 : {now.year}년 {now.month:02d}월 {now.day:02d}일 {now.hour:02d}시 {now.minute:02d}분"
-    html = f"""<div style="position: fixed;right: 30px;bottom: 18px;background: rgba(255,255,255,0.85);color: #222;font-size: 13px;border-radius: 7px;padding: 4px 14px;box-shadow: 1px 2px 8px #bbb;z-index: 9999;pointer-events: none;">{time_str}</div>"""
-    m.get_root().html.add_child(folium.Element(html))
-
-def make_map(df):
-    print("지도 작성 중 ...")
-    center_lat = df.iloc[0]['위도']
-    center_lon = df.iloc[0]['경도']
-    m = folium.Map(location=[center_lat, center_lon], zoom_start=13, max_zoom=21, tiles=None)
-    LocateControl(auto_start=False, flyTo=True, keepCurrentZoomLevel=True).add_to(m)
-    MeasureControl(primary_length_unit='meters', primary_area_unit='sqmeters').add_to(m)
-    vworld_base = "https://xdworld.vworld.kr/2d/Base/service/{z}/{x}/{y}.png"
-    folium.TileLayer(
-        tiles=vworld_base,
-        attr="VWorld Base",
-        name="VWorld 일반지도",
-        overlay=False,
-        control=True
-    ).add_to(m)
-    vworld_sat = "https://xdworld.vworld.kr/2d/Satellite/service/{z}/{x}/{y}.jpeg"
-    folium.TileLayer(
-        tiles=vworld_sat,
-        attr="VWorld Satellite",
-        name="VWorld 위성지도",
-        overlay=False,
-        control=True
-    ).add_to(m)
-    naver_tile = "https://map.pstatic.net/nrs/api/v1/raster/satellite/{z}/{x}/{y}.jpg?version=6.03"
-    folium.TileLayer(
-        tiles=naver_tile,
-        attr="Naver Satellite",
-        name="네이버 위성지도",
-        overlay=False,
-        control=True
-    ).add_to(m)
-    traffic_tile = "https://its.go.kr:9443/geoserver/gwc/service/wmts/rest/ntic:N_LEVEL_{z}/ntic:REALTIME/EPSG:3857/EPSG:3857:{z}/{y}/{x}?format=image/png8"
-    folium.TileLayer(
-        tiles=traffic_tile,
-        attr="국가교통정보센터",
-        name="실시간 교통정보",
-        overlay=True,
-        control=True,
-        max_zoom=15,
-        min_zoom=7,
-        fmt="image/png",
-        show=False
-    ).add_to(m)
-    fg1, fg2, fg_install, fg_remove, fg_change = add_markers_to_map(m, df)
-    add_generated_time(m)
-    return m
-
-def add_legend_and_controls(m, df):
-    # 범례에 신규 마커 추가, "범례"만 가운데 정렬
-    df_normal = df[~df['마커번호'].astype(str).str.startswith(('설치예정', '철거예정', '변경예정'))]
-    count_1 = ((df_normal['단수'] == 1)).sum()
-    count_2 = ((df_normal['단수'] == 2)).sum() // 2
-
-    count_install = df['마커번호'].astype(str).str.startswith('설치예정').sum()
-    count_remove = df['마커번호'].astype(str).str.startswith('철거예정').sum()
-    count_change = df['마커번호'].astype(str).str.startswith('변경예정').sum()
-
-    legend_html = f"""
-    <div id="legend" style="position: fixed; bottom: 50px; left: 50px; width: 160px; height: 140px; background-color: white; border:2px solid grey; z-index:9999; font-size:14px; padding: 10px; text-align:left;">
-        <div style="text-align:center; font-weight:bold;">범례</div>
-        <i style="background:blue; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 1단 - {count_1}개<br>
-        <i style="background:red; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 2단 - {count_2}개<br>
-        <i style="background:yellow; width:15px; height:15px; display:inline-block; border-radius:50%; border:1px solid #888;"></i> 설치예정 - {count_install}개<br>
-        <i style="background:#ff9800; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 철거예정 - {count_remove}개<br>
-        <i style="background:#a259e6; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 변경예정 - {count_change}개<br>
-    </div>
-    """
-    m.get_root().html.add_child(folium.Element(legend_html))
-    folium.LayerControl(collapsed=False).add_to(m)
-
-def add_custom_js_css(m):
-    custom_js_css = r"""<style>
-#showLatLngBtn {position: fixed;top: 20px;left: 50px;z-index: 9999;background: #1976d2;color: white;border: none;border-radius: 5px;padding: 8px 16px;font-size: 14px;cursor: pointer;box-shadow: 1px 2px 8px #888;}
-#toggleBtns {position: fixed;top: 20px;left: 210px;z-index: 9999;display: flex;gap: 8px;}
-#hideAllBtn, #showAllBtn {background: #e53935;color: white;border: none;border-radius: 5px;padding: 8px 16px;font-size: 14px;cursor: pointer;box-shadow: 1px 2px 8px #888;}
-#showAllBtn {background: #1976d2;margin-left: 0;}
-#searchBox {position: fixed;top: 70px;left: 50px;z-index: 9999;background: white;border: 1px solid #aaa;border-radius: 5px;padding: 8px 12px;width: 300px;box-shadow: 1px 2px 8px #888;}
-#imgOverlay {display: none;position: fixed;z-index: 10000;left: 0; top: 0; width: 100vw; height: 100vh;background: rgba(0,0,0,0.7);justify-content: center; align-items: center;}
-#imgOverlay img {max-width: 90vw; max-height: 80vh; border: 5px solid #fff; border-radius: 8px;}
-#imgOverlayClose {position: absolute; top: 30px; right: 40px; color: #fff; font-size: 2em; cursor: pointer;}
-</style>
-<button id="showLatLngBtn" class="search-btn">위/경도 표시</button>
-<span id="toggleBtns">
-    <button id="hideAllBtn">모두 감추기</button>
-    <button id="showAllBtn" style="display:none;">모두 보이기</button>
-</span>
-<div id="searchBox">
-    <input id="searchInput" type="text" placeholder="설치장소, 관리부서, 관리번호 검색">
-    <button id="searchBtn" class="search-btn">검색</button>
-    <button id="resetBtn" class="search-btn" style="margin-left:6px;">필터초기화</button>
-</div>
-<div id="imgOverlay" onclick="this.style.display='none'">
-    <span id="imgOverlayClose" onclick="document.getElementById('imgOverlay').style.display='none';event.stopPropagation();">&times;</span>
-    <img id="imgOverlayImg" src="">
-</div>
-<script>
-var latlngPopupActive = false;
-var latlngPopup;
-document.addEventListener('DOMContentLoaded', function() {
-    setTimeout(function() {
-        for (var key in window) {
-            if (key.startsWith("map_") && window[key] instanceof L.Map) {
-                window.map = window[key];
-            }
-        }
-        if (window.map) {
-            window.map.on('click', function(e) {
-                if (!latlngPopupActive) return;
-                if (latlngPopup) window.map.closePopup(latlngPopup);
-                latlngPopup = L.popup()
-                    .setLatLng(e.latlng)
-                    .setContent("위도: " + e.latlng.lat.toFixed(6) + "<br>경도: " + e.latlng.lng.toFixed(6))
-                    .openOn(window.map);
-            });
-        }
-        var showLatLngBtn = document.getElementById('showLatLngBtn');
-        if (showLatLngBtn) {
-            showLatLngBtn.onclick = function() {
-                latlngPopupActive = !latlngPopupActive;
-                this.innerText = latlngPopupActive ? "위/경도 끄기" : "위/경도 표시";
-                if (!latlngPopupActive && latlngPopup && window.map) {
-                    window.map.closePopup(latlngPopup);
-                }
-            };
-        }
-        var allMarkers = [];
-        if (window.map) {
-            window.map.eachLayer(function(layer) {
-                if (layer instanceof L.Marker && layer._popup) {
-                    allMarkers.push(layer);
-                }
-            });
-        }
-        var searchBtn = document.getElementById('searchBtn');
-        var resetBtn = document.getElementById('resetBtn');
-        var searchInput = document.getElementById('searchInput');
-        function filterMarkers() {
-            var q = searchInput.value.trim();
-            var isNumber = /^\d+$/.test(q);
-            allMarkers.forEach(function(marker) {
-                var html = marker._popup.getContent();
-                if (typeof html !== "string" && html && html.innerHTML) {
-                    html = html.innerHTML;
-                }
-                html = String(html).toLowerCase();
-                var show = false;
-                if (!q) {
-                    show = true;
-                } else if (isNumber) {
-                    var matches = html.match(/<td[^>]*>관리번호<\/td>\s*<td[^>]*>([^<]+)<\/td>/g);
-                    if (matches) {
-                        for (var i = 0; i < matches.length; i++) {
-                            var val = matches[i].replace(/.*<td[^>]*>관리번호<\/td>\s*<td[^>]*>([^<]+)<\/td>.*/, "$1").trim();
-                            if (val === q || val.startsWith(q + "-")) {
-                                show = true;
-                                break;
-                            }
-                        }
-                    }
-                } else {
-                    show = html.indexOf(q.toLowerCase()) !== -1;
-                }
-                if (show) {
-                    if (!window.map.hasLayer(marker)) marker.addTo(window.map);
-                } else {
-                    if (window.map.hasLayer(marker)) window.map.removeLayer(marker);
-                }
-            });
-        }
-        if (searchBtn) searchBtn.onclick = filterMarkers;
-        if (searchInput) searchInput.onkeydown = function(e) {
-            if (e.key === "Enter") filterMarkers();
-        };
-        if (resetBtn) resetBtn.onclick = function() {
-            searchInput.value = "";
-            allMarkers.forEach(function(marker) {
-                if (!window.map.hasLayer(marker)) marker.addTo(window.map);
-            });
-        };
-    }, 300);
-    var hideBtn = document.getElementById('hideAllBtn');
-    var showBtn = document.getElementById('showAllBtn');
-    hideBtn.onclick = function() {
-        document.getElementById('showLatLngBtn').style.display = 'none';
-        document.getElementById('searchBox').style.display = 'none';
-        var legend = document.getElementById('legend');
-        if (legend) legend.style.display = 'none';
-        var layerControls = document.getElementsByClassName('leaflet-control-layers');
-        for (var i = 0; i < layerControls.length; i++) {
-            layerControls[i].style.display = 'none';
-        }
-        hideBtn.style.display = 'none';
-        showBtn.style.display = '';
-    };
-    showBtn.onclick = function() {
-        document.getElementById('showLatLngBtn').style.display = '';
-        document.getElementById('searchBox').style.display = '';
-        var legend = document.getElementById('legend');
-        if (legend) legend.style.display = '';
-        var layerControls = document.getElementsByClassName('leaflet-control-layers');
-        for (var i = 0; i < layerControls.length; i++) {
-            layerControls[i].style.display = '';
-        }
-        hideBtn.style.display = '';
-        showBtn.style.display = 'none';
-    };
-});
-document.addEventListener('click', function(e) {
-    if (e.target.tagName === 'IMG' && e.target.classList.contains('popup-img')) {
-        var overlay = document.getElementById('imgOverlay');
-        var overlayImg = document.getElementById('imgOverlayImg');
-        overlayImg.src = e.target.src;
-        overlay.style.display = 'flex';
-        e.stopPropagation();
-    }
-});
-</script>
-"""
-    m.get_root().html.add_child(folium.Element(custom_js_css))
-
-def save_map(m, filename):
-    m.save(filename)
-    print("\nHTML 파일 저장 완료:", filename)
-
-def upload_or_update(repo, path_local, path_remote):
-    print(f"업로드 시도: {path_local} -> {path_remote}")
-    with open(path_local, "rb") as f:
-        content = f.read()
-    try:
-        contents = repo.get_contents(path_remote)
-        repo.update_file(path_remote, "자동 업로드", content, contents.sha)
-        print(f"업데이트: {path_remote}")
-    except Exception as e:
-        print(f"신규 생성 시도: {path_remote} (사유: {e})")
-        repo.create_file(path_remote, "자동 업로드", content)
-        print(f"생성: {path_remote}")
-
-def github_upload(filename):
-    from dotenv import load_dotenv
-    load_dotenv()
-    GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-    SHARE_URL = f'come6433.github.io/q8r2x7v1p0/{filename}'
-    g = Github(GITHUB_TOKEN)
-    repo = g.get_repo(REPO_NAME)
-    answer = input("\n업로드 하시겠습니까? (y/n): ").strip().lower()
-    if answer == "y":
-        print("\nHTML 파일 업로드 시작")
-        upload_or_update(repo, filename, filename)
-        excel_name = '관리목록.xlsx'
-        if os.path.exists(excel_name):
-            upload_or_update(repo, excel_name, excel_name)
-            print(f"{excel_name} 파일도 업로드 완료!")
-        else:
-            print(f"{excel_name} 파일이 존재하지 않아 업로드하지 않았습니다.")
-        print("\n서버 업로드 완료!")
-        print(f"공유주소: {SHARE_URL}")
-        print(f"※※※ 페이지가 정상적으로 표시되려면 1~2분 정도 기다려야 합니다. ※※※")
-    else:
-        print("\n업로드를 취소했습니다.")
-
-def main():
-    check_and_update()
-    print_intro()
-    df = read_excel('관리목록.xlsx')
-    m = make_map(df)
-    add_legend_and_controls(m, df)
-    add_custom_js_css(m)
-    save_map(m, FILENAME)
-    github_upload(FILENAME)
-    print("=" * 40)
-    input("아무 키나 누르면 종료합니다.")
-
-if __name__ == "__main__":
-    main()
+import argparse
+import base64
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import collections
+import contextlib
+import hashlib
+import io
+import json
+import math
+import os
+import pickle
+import shutil
+import datetime
+import gzip
+import sys
+import re
+import threading
+import time
+import tracemalloc
+import uuid
+
+CURRENT_VERSION = "2.0.6"
+UPDATE_DATE = "2025-05-22"
+GITHUB_RAW_URL = "https://raw.githubusercontent.com/come6433/q8r2x7v1p0/main/PACSmaker.py"
+REPO_NAME = 'come6433/q8r2x7v1p0'
+FILENAME = "PACS.html"
+UPDATE_CHECK_TTL = 6 * 60 * 60  # 업데이트 확인 결과를 다시 쓰는 시간(초)
+IMAGES_DIR = 'images'
+THUMBS_DIR = 'thumbs'
+CACHE_DIR = '.pacs_cache'
+THUMB_SIZE = 240     # 팝업 썸네일 최대 변 길이(px) - 120px 표시, 고해상도 화면 대비 2배
+OVERLAY_SIZE = 1280  # 확대보기(#imgOverlay)용 이미지 최대 변 길이(px)
+POPUP_MODE = "lazy"  # "lazy": 마커 클릭 시 JSON 데이터로 팝업 생성, "html": 모든 팝업 HTML을 미리 생성
+RENDER_ENGINE = "dom"  # "dom": 마커마다 DivIcon, "canvas": 캔버스에 원+라벨, "cluster": 레이어별 클러스터
+WORKERS = 1  # 사진 변환, 팝업 생성에 쓸 프로세스 수 (1이면 순차 처리)
+PARALLEL_MIN_GROUPS = 200  # 새로 만들 마커 그룹이 이보다 적으면 프로세스 풀을 띄우지 않음
+TILE_DEG = 0.02  # 타일 출력 모드의 격자 크기(위도/경도 도 단위, 약 2km)
+WATCH_INTERVAL = 0.5  # watch 모드에서 엑셀/사진 폴더를 확인하는 간격(초)
+WATCH_DEBOUNCE = 0.8  # 마지막 변경 후 이만큼 조용해지면 다시 생성 (연속 저장을 한 번으로 묶음)
+TILE_PROXY_PORT = 8001
+PREFETCH_ZOOMS = (13, 19)
+PREFETCH_MAX_TILES = 300000  # prefetch가 이보다 많은 타일을 받아야 하면 --max-tiles 없이는 멈춤
+# 배경지도 레이어: 키는 타일 프록시 경로(/tiles/<key>/z/x/y)와 캐시 폴더 이름으로 씀
+# ttl(초)이 지난 타일은 원본에서 다시 받고, cache_mb를 넘으면 가장 오래 안 쓴 타일부터 지움
+TILE_LAYERS = [
+    {'key': 'vworld_base', 'url': "https://xdworld.vworld.kr/2d/Base/service/{z}/{x}/{y}.png",
+     'attr': "VWorld Base", 'name': "VWorld 일반지도", 'overlay': False,
+     'ttl': 30 * 86400, 'cache_mb': 1024},
+    {'key': 'vworld_sat', 'url': "https://xdworld.vworld.kr/2d/Satellite/service/{z}/{x}/{y}.jpeg",
+     'attr': "VWorld Satellite", 'name': "VWorld 위성지도", 'overlay': False,
+     'ttl': 180 * 86400, 'cache_mb': 4096},
+    {'key': 'naver_sat', 'url': "https://map.pstatic.net/nrs/api/v1/raster/satellite/{z}/{x}/{y}.jpg?version=6.03",
+     'attr': "Naver Satellite", 'name': "네이버 위성지도", 'overlay': False,
+     'ttl': 180 * 86400, 'cache_mb': 4096},
+    {'key': 'its_traffic', 'url': "https://its.go.kr:9443/geoserver/gwc/service/wmts/rest/ntic:N_LEVEL_{z}/ntic:REALTIME/EPSG:3857/EPSG:3857:{z}/{y}/{x}?format=image/png8",
+     'attr': "국가교통정보센터", 'name': "실시간 교통정보", 'overlay': True,
+     'ttl': 60, 'cache_mb': 128, 'options': {'max_zoom': 15, 'min_zoom': 7, 'fmt': "image/png", 'show': False}},
+]
+BATCH_JOBS = 2  # batch 모드에서 동시에 만들 지도 수
+DISTRICT_COLUMN = '구역'  # 전체 지도에서 어느 엑셀(구역)의 게시대인지 표시하는 칼럼
+NEAR_CELL_DEG = 0.005  # 주변 검색 격자 크기(도, 약 500m)
+NEARBY_K = 20  # "내 주변"에 보여줄 최대 게시대 수
+NEARBY_RADIUS_M = 1000  # "내 주변" 검색 반경(m)
+COLOCATED_TOLERANCE_M = 1.0  # 마커번호가 다른데 이 거리 안에 있으면 좌표 중복으로 경고
+STREAM_OUTPUT = True  # build(write_map)에서 마커 데이터를 페이지 문자열에 넣지 않고 save_map이 조금씩 쓰게 함
+# 마커 조각은 빌드 캐시 파일(FragmentStore)에서 묶음씩 읽어 쓰므로 팝업 HTML 전체가 메모리에 올라오지 않음
+# (남는 것은 엑셀 표, 검색/주변 색인처럼 행 수에 비례하는 부분)
+STREAM_CHUNK = 500  # 스트리밍 저장 시 한 번에 쓰는 마커 수
+STREAM_TOKEN = "/*@@PACS_STREAM_{}@@*/"
+STREAM_TOKEN_RE = re.compile(r"/\*@@PACS_STREAM_(\d+)@@\*/")
+STYLE_CLASS_MIN_COUNT = 2  # 같은 인라인 style이 이만큼 반복되면 공용 CSS 클래스로 뺌
+PROFILE = None  # --profile 실행 중에만 {'stages': {...}, 'counters': {...}}
+
+def get_version_from_text(text):
+    m = re.search(r'CURRENT_VERSION\s*=\s*["\']([\d\.]+)["\']', text)
+    return m.group(1) if m else None
+
+def normalize_version(v):
+    parts = v.split(".")
+    if len(parts) == 2 and parts[1].endswith("0"):
+        parts[1] = parts[1].rstrip("0")
+        if parts[1] == "":
+            parts[1] = "0"
+    return tuple(map(int, parts))
+
+def version_compare(a, b):
+    na = normalize_version(a)
+    nb = normalize_version(b)
+    return (na > nb) - (na < nb)
+
+def check_for_update():
+    # 원격 PACSmaker.py 버전 확인 (네트워크 작업만 하고 파일은 바꾸지 않음)
+    # 결과는 .pacs_cache에 저장해 UPDATE_CHECK_TTL 동안 재사용하고, ETag/Last-Modified로 바뀐 경우에만 내려받음
+    import requests
+    state_path = os.path.join(CACHE_DIR, "update.json")
+    script_path = os.path.join(CACHE_DIR, "update_remote.py")
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except Exception:
+        state = {}
+    messages = []
+    if time.time() - state.get('checked_at', 0) >= UPDATE_CHECK_TTL:
+        headers = {}
+        if state.get('etag'):
+            headers['If-None-Match'] = state['etag']
+        if state.get('last_modified'):
+            headers['If-Modified-Since'] = state['last_modified']
+        try:
+            r = requests.get(GITHUB_RAW_URL, headers=headers, timeout=5)
+            if r.status_code == 200:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(script_path, "w", encoding="utf-8") as f:
+                    f.write(r.text)
+                state.update(
+                    remote_version=get_version_from_text(r.text),
+                    etag=r.headers.get('ETag'),
+                    last_modified=r.headers.get('Last-Modified'),
+                )
+            elif r.status_code != 304:
+                messages.append(f"업데이트 서버 연결 실패: {r.status_code}")
+                return {'messages': messages}
+            state['checked_at'] = time.time()
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(state_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+        except Exception as e:
+            messages.append(f"업데이트 확인 중 오류: {e}")
+            return {'messages': messages}
+    remote_version = state.get('remote_version')
+    if remote_version and version_compare(remote_version, CURRENT_VERSION) > 0 and os.path.exists(script_path):
+        return {'messages': messages, 'version': remote_version, 'script': script_path}
+    messages.append("최신 버전입니다.")
+    return {'messages': messages}
+
+def start_update_check():
+    # 엑셀 읽기, 지도 작성과 동시에 백그라운드에서 업데이트 확인
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(check_for_update()), daemon=True)
+    thread.start()
+    return thread, result
+
+def apply_pending_update(check, wait=5):
+    # 지도 저장이 끝난 뒤에 호출: 확인 결과를 출력하고 새 버전이 있으면 스크립트 교체
+    thread, result = check
+    thread.join(wait)
+    if thread.is_alive():
+        print("업데이트 확인이 끝나지 않아 다음 실행 때 다시 확인합니다.")
+        return False
+    for message in result.get('messages', []):
+        print(message)
+    if not result.get('version'):
+        return False
+    return install_update(result)
+
+def install_update(result):
+    print(f"\n새 버전({result['version']})이 있습니다. 자동 업데이트를 진행합니다.")
+    with open(result['script'], encoding="utf-8") as f:
+        remote_text = f.read()
+    if get_version_from_text(remote_text) != result['version']:
+        return False
+    try:
+        os.replace(__file__, __file__ + ".bak")
+    except Exception:
+        pass
+    with open(__file__, "w", encoding="utf-8") as f:
+        f.write(remote_text)
+    print("업데이트 완료! 다음 실행부터 새 버전이 적용됩니다.")
+    return True
+
+def print_intro():
+    print("=" * 40)
+    print("      PACS 저상게시대 지도 생성기")
+    print("=" * 40)
+    print("버전:        ", CURRENT_VERSION)
+    print("업데이트:    ", UPDATE_DATE)
+    print("- 변경예정 마커색깔 변경 : 보라색")
+    print("- 마커번호 불일치 변경")
+    print("=" * 40)
+
+def peak_rss_mb():
+    # 이 프로세스의 최대 메모리(RSS, MB) - 운영체제 통계를 읽으므로 시간 측정에 영향이 없음
+    # 프로세스 풀 작업자의 메모리는 포함되지 않음, 얻을 수 없으면 None
+    try:
+        import resource
+    except ImportError:
+        return windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10  # macOS는 바이트, 리눅스는 KB
+
+def windows_peak_rss_mb():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage",
+                )
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(counters)
+        kernel32, psapi = ctypes.windll.kernel32, ctypes.windll.psapi
+        kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(Counters), wintypes.DWORD]
+        if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+            return None
+        return counters.PeakWorkingSetSize / 2 ** 20
+    except Exception:
+        return None
+
+@contextlib.contextmanager
+def profile_stage(name):
+    # --profile 일 때 단계별 실제 시간, CPU 시간, 단계가 끝난 시점까지의 프로세스 최대 메모리(rss_mb) 기록
+    # --profile-memory면 단계 안의 최대 할당량(peak_mb, tracemalloc)도 재지만 그동안 시간은 몇 배 느려짐
+    # 단계는 겹치지 않게 나눠 씀 (겹치면 바깥 단계의 최대 메모리가 부정확해짐)
+    if PROFILE is None:
+        yield
+        return
+    trace = PROFILE['trace']
+    if trace:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        elapsed, cpu_elapsed = time.perf_counter() - wall, time.process_time() - cpu
+        stage = PROFILE['stages'].setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'rss_mb': None, 'calls': 0})
+        stage['wall_s'] += elapsed
+        stage['cpu_s'] += cpu_elapsed
+        rss = peak_rss_mb()
+        if rss is not None:
+            stage['rss_mb'] = max(stage['rss_mb'] or 0.0, rss)
+        if trace:
+            stage['peak_mb'] = max(stage.get('peak_mb', 0.0), (tracemalloc.get_traced_memory()[1] - base) / 2 ** 20)
+        stage['calls'] += 1
+
+def profile_count(name, n=1):
+    # 프로세스 풀 작업자 안에서 센 값은 합쳐지지 않으므로 부모 프로세스에서 셈
+    if PROFILE is not None:
+        PROFILE['counters'][name] = PROFILE['counters'].get(name, 0) + n
+
+def run_profiled(func, report="pacs_profile.json", dump=None, trace=False):
+    # func()를 프로파일 모드로 실행하고 JSON 보고서(+ 선택적으로 cProfile 덤프)를 씀
+    # 덤프는 pstats 형식이라 snakeviz, flameprof, gprof2dot 등으로 볼 수 있음
+    # trace=True(--profile-memory)일 때만 tracemalloc을 켬 - 켜면 시간이 부풀려지므로 시간은 trace 없이 잰 값을 볼 것
+    global PROFILE
+    PROFILE = {'stages': {}, 'counters': {}, 'trace': trace}
+    profiler = None
+    if dump:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            return func()
+        finally:
+            if profiler:
+                profiler.disable()
+    finally:
+        result = {
+            'version': CURRENT_VERSION,
+            'started': datetime.datetime.now().isoformat(timespec="seconds"),
+            'memory_traced': trace,
+            'total': {'wall_s': time.perf_counter() - wall, 'cpu_s': time.process_time() - cpu, 'rss_mb': peak_rss_mb()},
+            'stages': PROFILE['stages'],
+            'counters': PROFILE['counters'],
+        }
+        if trace:
+            result['total']['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+        PROFILE = None
+        with open(report, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        if profiler:
+            profiler.dump_stats(dump)
+        print("\n" + "=" * 40)
+        if trace:
+            print("tracemalloc을 켠 실행이라 시간이 실제보다 깁니다.")
+        for name, stage in result['stages'].items():
+            memory = f"최대 RSS {stage['rss_mb']:8.1f}MB" if stage['rss_mb'] is not None else "최대 RSS        -"
+            if trace:
+                memory += f"  할당 {stage['peak_mb']:8.1f}MB"
+            print(f"{name:24s} {stage['wall_s']:8.3f}s  CPU {stage['cpu_s']:8.3f}s  {memory}")
+        for name, value in result['counters'].items():
+            print(f"{name:24s} {value}")
+        print(f"프로파일 보고서: {report}" + (f", cProfile 덤프: {dump}" if dump else ""))
+        print("=" * 40)
+
+REQUIRED_COLUMNS = ['설치장소', '관리번호', '위도', '경도']
+MAX_COLUMNS = 26  # A~Z 칼럼까지만 사용 (팝업도 Z까지만 표시)
+PARSER_VERSION = 3  # parse_excel 결과가 달라지게 고치면 올림 (예전 스냅샷을 버림)
+
+def snapshot_schema():
+    # 파싱 스냅샷을 다시 써도 되는지 판단하는 값 - 앱 버전이 아니라 파서와 그 설정, pandas 버전에 묶음
+    import pandas as pd
+    return json.dumps([PARSER_VERSION, REQUIRED_COLUMNS, MAX_COLUMNS, pd.__version__], ensure_ascii=False)
+
+def parse_excel(filename):
+    import openpyxl
+    import pandas as pd
+    # 읽기 전용(스트리밍) 모드로 한 줄씩 읽으면서 필수 칸이 빈 행은 바로 버림
+    wb = openpyxl.load_workbook(filename, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        # 시트에 저장된 크기(<dimension>)는 틀린 경우가 있어(예: A1) 무시하고 실제 행을 읽음
+        ws.reset_dimensions()
+        rows = ws.iter_rows(min_row=2, values_only=True)
+        col_names = list(next(rows, ()))[:MAX_COLUMNS]
+        # 제목 행의 마지막 값까지만 칼럼으로 봄 (Z 칼럼까지)
+        while col_names and col_names[-1] is None:
+            col_names.pop()
+        width = len(col_names)
+        required = [col_names.index(col) for col in REQUIRED_COLUMNS]
+        data = []
+        for row in rows:
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            if all(row[i] is not None for i in required):
+                data.append(row)
+    finally:
+        wb.close()
+    df = pd.DataFrame(data, columns=col_names)
+    df['위도'] = pd.to_numeric(df['위도'], errors='coerce')
+    df['경도'] = pd.to_numeric(df['경도'], errors='coerce')
+    df = df.dropna(subset=REQUIRED_COLUMNS)
+    if '단수' in df.columns:
+        단수 = pd.to_numeric(df['단수'], errors='coerce')
+        df['단수'] = 단수.where(단수 % 1 == 0).astype('Int64')
+    if '관리부서' in df.columns:
+        df['관리부서'] = df['관리부서'].astype('category')
+    return df
+
+def read_excel(filename):
+    import pandas as pd
+    print(f"{os.path.basename(filename)} 파일을 읽는 중...\n")
+    # 파싱 결과를 .pacs_cache에 저장해 두고, 엑셀 수정시각(또는 내용 해시)이 같으면 openpyxl 없이 바로 읽음
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    name = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()[:12]
+    snapshot_path = os.path.join(CACHE_DIR, f"excel_{name}.pkl")
+    meta_path = os.path.join(CACHE_DIR, f"excel_{name}.json")
+    st = os.stat(filename)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except Exception:
+        meta = {}
+    digest = None
+    schema = snapshot_schema()
+    if meta.get('schema') == schema:
+        if meta.get('size') != st.st_size or meta.get('mtime') != st.st_mtime_ns:
+            digest = file_hash(filename)
+        if digest is None or digest == meta.get('hash'):
+            try:
+                df = pd.read_pickle(snapshot_path)
+            except Exception:
+                df = None
+            if df is not None:
+                if digest is not None:
+                    meta.update(size=st.st_size, mtime=st.st_mtime_ns)
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump(meta, f)
+                return df
+    df = parse_excel(filename)
+    df.to_pickle(snapshot_path, protocol=pickle.HIGHEST_PROTOCOL)
+    meta = {'schema': schema, 'size': st.st_size, 'mtime': st.st_mtime_ns,
+            'hash': digest or file_hash(filename)}
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return df
+
+def image_to_base64(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    encoded = base64.b64encode(data).decode()
+    profile_count("images_inlined")
+    profile_count("bytes_inlined", len(encoded))
+    return encoded
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def resize_image(src, dst, max_size):
+    # 임시 파일 이름에 프로세스 번호를 넣어 여러 지도가 같은 썸네일을 동시에 만들어도 충돌하지 않게 함
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        # Pillow 미설치 시 원본을 그대로 복사 (참조 방식은 동일하게 유지)
+        shutil.copyfile(src, tmp)
+    else:
+        with Image.open(src) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            img.thumbnail((max_size, max_size))
+            img.save(tmp, "JPEG", quality=80, optimize=True)
+    os.replace(tmp, dst)
+
+def resize_images(jobs, workers=WORKERS):
+    # jobs: [(원본, 저장 경로, 최대 크기)], 서로 독립이라 여러 프로세스로 나눠 처리
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(resize_image, *zip(*jobs), chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        for src, dst, size in jobs:
+            resize_image(src, dst, size)
+
+def build_image_cache(df, images_dir, out_dir, workers=WORKERS):
+    # 사진을 내용 해시 이름의 썸네일/확대 이미지로 변환해 HTML 옆(out_dir)에 저장
+    # 같은 사진을 쓰는 게시대는 파일 하나를 공유하고, 해시가 같으면 다시 변환하지 않음
+    print("사진 썸네일 생성 중 ...")
+    os.makedirs(out_dir, exist_ok=True)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    index_path = os.path.join(CACHE_DIR, "images.json")
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception:
+        index = {}
+    new_index = {}
+    images = {}
+    jobs = {}
+    ref_dir = os.path.basename(os.path.normpath(out_dir))
+    for 관리번호 in df['관리번호'].map(str).unique():
+        path = f"{images_dir}/{관리번호}.jpg"
+        if not os.path.exists(path):
+            continue
+        st = os.stat(path)
+        entry = index.get(path)
+        if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+            digest = entry['hash']
+        else:
+            digest = file_hash(path)[:20]
+        new_index[path] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'hash': digest}
+        thumb = f"{digest}_t.jpg"
+        medium = f"{digest}_m.jpg"
+        for name, size in ((thumb, THUMB_SIZE), (medium, OVERLAY_SIZE)):
+            dst = os.path.join(out_dir, name)
+            if dst not in jobs and not os.path.exists(dst):
+                jobs[dst] = (path, dst, size)
+        images[관리번호] = (f"{ref_dir}/{thumb}", f"{ref_dir}/{medium}")
+    resize_images(list(jobs.values()), workers)
+    profile_count("photos", len(images))
+    profile_count("images_resized", len(jobs))
+    # 여러 엑셀이 같은 색인을 쓰므로(batch) 저장 직전에 다시 읽어 합치고, 지워진 사진 항목만 뺌
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception:
+        index = {}
+    index.update(new_index)
+    index = {path: entry for path, entry in index.items() if os.path.exists(path)}
+    tmp = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp, index_path)
+    print(f"사진 {len(images)}개 (새로 변환한 파일 {len(jobs)}개)\n")
+    return images
+
+def get_color(단수, marker_no):
+    marker_no_str = str(marker_no)
+    if marker_no_str.startswith('설치예정'):
+        return 'yellow'  # 노란색
+    if marker_no_str.startswith('철거예정'):
+        return '#ff9800'  # orange
+    if marker_no_str.startswith('변경예정'):
+        return '#a259e6'  # 보라색 (purple)
+    try:
+        if int(단수) == 1:
+            return 'blue'
+        else:
+            return 'red'
+    except Exception:
+        return 'blue'
+
+def get_marker_text_color(bg_color):
+    # 밝은 배경은 검정, 어두운 배경은 흰색
+    if bg_color in ['red', 'blue', '#00bcd4', '#a259e6', '#ff9800']:
+        return 'white'
+    if bg_color in ['yellow', 'pink']:
+        return 'black'
+    return 'black'
+
+def popup_column_positions(df):
+    # 팝업 표에 보일 칼럼 위치 목록
+    exclude_cols = ['마커번호', '관리번호', '위도', '경도', '설치장소', '단수', '순번']
+    # Z칼럼 이후(AA~)는 무시
+    max_col_index = 25  # 0부터 시작(Z=25)
+    positions = []
+    for idx, col in enumerate(df.columns):
+        if col in exclude_cols:
+            continue
+        if idx > max_col_index:
+            break
+        positions.append(idx)
+    return positions
+
+def popup_columns(df):
+    return [df.columns[idx] for idx in popup_column_positions(df)]
+
+def make_popup_html(group, df, images=None):
+    import pandas as pd
+    first = group.iloc[0]
+    설치장소 = first['설치장소'] if '설치장소' in group.columns else ""
+    popup_html = f"<div style='text-align:center;'><b class='popup-title'>{설치장소}</b><br>"
+    popup_html += "<table style='border-collapse:collapse; width:auto; margin:8px auto 0 auto;'><tr>"
+    for _, row in group.iterrows():
+        관리번호 = str(row['관리번호'])
+        image_path = f"{IMAGES_DIR}/{관리번호}.jpg"
+        if images is not None and 관리번호 in images:
+            thumb, medium = images[관리번호]
+            popup_html += (
+                f"<td style='padding:4px 8px; text-align:center;'>"
+                f"<img src='{thumb}' data-full='{medium}' width='120' class='popup-img' "
+                "style='cursor:zoom-in;display:block;margin:0 auto;'><br>"
+                f"<span style='font-weight:bold'>{관리번호}</span></td>"
+            )
+        elif images is None and os.path.exists(image_path):
+            img_base64 = image_to_base64(image_path)
+            popup_html += (
+                f"<td style='padding:4px 8px; text-align:center;'>"
+                f"<img src='data:image/jpeg;base64,{img_base64}' width='120' class='popup-img' "
+                "style='cursor:zoom-in;display:block;margin:0 auto;'><br>"
+                f"<span style='font-weight:bold'>{관리번호}</span></td>"
+            )
+        else:
+            popup_html += (
+                f"<td style='padding:4px 8px; text-align:center;'>"
+                f"<div style='width:120px;height:90px;background:#eee;display:flex;align-items:center;justify-content:center;'>이미지 없음</div>"
+                f"<br><span style='font-weight:bold'>{관리번호}</span></td>"
+            )
+    popup_html += "</tr></table>"
+    col_count = group.shape[0]
+    min_width = 120 * col_count
+    popup_html += f"<table style='border-collapse:collapse; width:auto; min-width:{min_width}px; margin:8px auto 0 auto;'>"
+    popup_html += "<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>관리번호</td>"
+    for _, row in group.iterrows():
+        popup_html += f"<td style='border:1px solid #000; padding:4px 8px; background:#e3f2fd; font-weight:bold;'>{row['관리번호']}</td>"
+    popup_html += "</tr>"
+    for col in popup_columns(df):
+        popup_html += f"<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>{col}</td>"
+        for _, row in group.iterrows():
+            val = row[col] if pd.notnull(row[col]) else ""
+            if isinstance(val, str):
+                val = val.replace('\r\n', '<br>').replace('\n', '<br>')
+            popup_html += f"<td style='border:1px solid #000; padding:4px 8px;'>{val}</td>"
+        popup_html += "</tr>"
+    popup_html += "</table><br></div>"
+    return popup_html
+
+POPUP_HEAD = (
+    "<div style='text-align:center;'><b class='popup-title'>{}</b><br>"
+    "<table style='border-collapse:collapse; width:auto; margin:8px auto 0 auto;'><tr>"
+).format
+POPUP_IMG_TD = (
+    "<td style='padding:4px 8px; text-align:center;'>"
+    "<img src='{}' data-full='{}' width='120' class='popup-img' "
+    "style='cursor:zoom-in;display:block;margin:0 auto;'><br>"
+    "<span style='font-weight:bold'>{}</span></td>"
+).format
+POPUP_INLINE_IMG_TD = (
+    "<td style='padding:4px 8px; text-align:center;'>"
+    "<img src='{}' width='120' class='popup-img' "
+    "style='cursor:zoom-in;display:block;margin:0 auto;'><br>"
+    "<span style='font-weight:bold'>{}</span></td>"
+).format
+POPUP_NO_IMG_TD = (
+    "<td style='padding:4px 8px; text-align:center;'>"
+    "<div style='width:120px;height:90px;background:#eee;display:flex;align-items:center;justify-content:center;'>이미지 없음</div>"
+    "<br><span style='font-weight:bold'>{}</span></td>"
+).format
+POPUP_TABLE = (
+    "</tr></table>"
+    "<table style='border-collapse:collapse; width:auto; min-width:{}px; margin:8px auto 0 auto;'>"
+    "<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>관리번호</td>"
+).format
+POPUP_ID_TD = "<td style='border:1px solid #000; padding:4px 8px; background:#e3f2fd; font-weight:bold;'>{}</td>".format
+POPUP_LABEL_TD = "<tr><td style='border:1px solid #000; padding:4px 8px; background:#f0f0f0; font-weight:bold;'>{}</td>".format
+POPUP_VALUE_TD = "<td style='border:1px solid #000; padding:4px 8px;'>{}</td>".format
+
+def marker_groups(df):
+    # {마커번호: 행 위치 배열}, df.groupby('마커번호') 순회 순서와 같음
+    # 여러 엑셀을 합친 전체 지도(df.attrs['districts'])는 (구역, 마커번호)로 묶어 구역 간 번호가 겹치지 않게 함
+    if df.attrs.get('districts'):
+        return df.groupby([DISTRICT_COLUMN, '마커번호']).indices
+    return df.groupby('마커번호').indices
+
+def clean_popup_column(series):
+    # 빈 값은 "", 줄바꿈은 <br> - 칼럼 전체를 한 번에 처리
+    values = series.astype(object).where(series.notna(), "").map(str)
+    return values.str.replace('\r\n', '<br>', regex=False).str.replace('\n', '<br>', regex=False).tolist()
+
+def photo_keys(df):
+    # 행마다 images 사전을 찾을 키: 관리번호, 여러 구역을 합친 전체 지도는 (구역, 관리번호)
+    ids = df['관리번호'].map(str).tolist()
+    if df.attrs.get('districts'):
+        return list(zip(df[DISTRICT_COLUMN].tolist(), ids))
+    return ids
+
+def popup_image(key, images):
+    # (src, 확대 이미지) 또는 사진이 없으면 None, images가 없으면 원본을 base64로 넣음
+    if images is not None:
+        return tuple(images[key]) if key in images else None
+    관리번호 = key[-1] if isinstance(key, tuple) else key
+    image_path = f"{IMAGES_DIR}/{관리번호}.jpg"
+    if os.path.exists(image_path):
+        return (f"data:image/jpeg;base64,{image_to_base64(image_path)}", None)
+    return None
+
+def prepare_popup_data(df, images=None):
+    # {마커번호: (행 위치, 설치장소, 관리번호 목록, 사진 목록, 칼럼별 값 목록)}
+    columns = [clean_popup_column(df.iloc[:, idx]) for idx in popup_column_positions(df)]
+    ids = df['관리번호'].map(str).tolist()
+    keys = photo_keys(df)
+    places = df['설치장소'].map(str).tolist()
+    photos = {key: popup_image(key, images) for key in dict.fromkeys(keys)}
+    data = {}
+    for marker_no, rows in marker_groups(df).items():
+        group_ids = [ids[r] for r in rows]
+        data[marker_no] = (
+            rows, places[rows[0]], group_ids, [photos[keys[r]] for r in rows],
+            [[values[r] for r in rows] for values in columns],
+        )
+    return data
+
+def render_popup_html(place, ids, imgs, values, labels):
+    # make_popup_html과 같은 HTML을 미리 만든 템플릿으로 생성
+    parts = [POPUP_HEAD(place)]
+    for 관리번호, img in zip(ids, imgs):
+        if img is None:
+            parts.append(POPUP_NO_IMG_TD(관리번호))
+        elif img[1] is None:
+            parts.append(POPUP_INLINE_IMG_TD(img[0], 관리번호))
+        else:
+            parts.append(POPUP_IMG_TD(img[0], img[1], 관리번호))
+    parts.append(POPUP_TABLE(120 * len(ids)))
+    parts.extend(map(POPUP_ID_TD, ids))
+    parts.append("</tr>")
+    for label, row in zip(labels, values):
+        parts.append(POPUP_LABEL_TD(label))
+        parts.extend(map(POPUP_VALUE_TD, row))
+        parts.append("</tr>")
+    parts.append("</table><br></div>")
+    return "".join(parts)
+
+def build_popup_html_all(df, images=None):
+    # 모든 마커 그룹의 팝업 HTML {마커번호: HTML}
+    labels = [str(col) for col in popup_columns(df)]
+    return {
+        marker_no: render_popup_html(place, ids, imgs, values, labels)
+        for marker_no, (rows, place, ids, imgs, values) in prepare_popup_data(df, images).items()
+    }
+
+LAYER_NAMES = ['1단 (파랑)', '2단 (빨강)', '설치예정(청록)', '철거예정(주황)', '변경예정(보라)']
+LAYER_COLORS = ['blue', 'red', 'yellow', '#ff9800', '#a259e6']
+CLUSTER_ICON_JS = """function(cluster) {
+    return L.divIcon({className: "empty", iconSize: L.point(36, 36), html: '<div style="background-color:%s;color:%s;border-radius:50%%;text-align:center;'
+        + 'width:36px;height:36px;line-height:36px;font-size:12px;font-weight:bold;border:1.5px solid #888;opacity:0.85;">' + cluster.getChildCount() + '</div>'});
+}"""
+
+def marker_style(marker_no, first):
+    # 마커 라벨, 색상, 크기와 들어갈 레이어(LAYER_NAMES 순번) 계산
+    import pandas as pd
+    if isinstance(marker_no, tuple):
+        marker_no = marker_no[-1]  # 전체 지도의 (구역, 마커번호)
+    marker_no_str = str(marker_no)
+    if marker_no_str.startswith('설치예정'):
+        # 숫자만 추출
+        num = re.sub(r'\D', '', marker_no_str)
+        marker_label = f"설{num}" if num else "설"
+        단수 = 1
+        layer = 2
+    elif marker_no_str.startswith('철거예정'):
+        num = re.sub(r'\D', '', marker_no_str)
+        marker_label = f"철{num}" if num else "철"
+        단수 = 1
+        layer = 3
+    elif marker_no_str.startswith('변경예정'):
+        num = re.sub(r'\D', '', marker_no_str)
+        marker_label = f"변{num}" if num else "변"
+        단수 = 1
+        layer = 4
+    else:
+        marker_label = marker_no_str
+        단수 = first['단수'] if pd.notnull(first['단수']) else 1
+        layer = 0 if int(단수) == 1 else 1
+
+    # 마커 라벨 길이에 따라 원 크기와 폰트 크기 자동 조정
+    label_len = len(marker_label)
+    if label_len <= 2:
+        size = 24
+        font_size = 12
+    elif label_len == 3:
+        size = 28
+        font_size = 12
+    elif label_len == 4:
+        size = 32
+        font_size = 11
+    else:
+        size = 36
+        font_size = 10
+
+    bg_color = get_color(단수, marker_no)
+    text_color = get_marker_text_color(bg_color)
+    return {
+        'label': marker_label, 'bg': bg_color, 'fg': text_color,
+        'size': size, 'font_size': font_size, 'layer': layer,
+    }
+
+def make_icon_html(style):
+    return (
+        f"""<div style="background-color:{style['bg']};color:{style['fg']};border-radius:50%;text-align:center;"""
+        f"""width:{style['size']}px;height:{style['size']}px;line-height:{style['size']}px;font-size:{style['font_size']}px;border:1.5px solid #888;overflow:hidden;white-space:nowrap;">{style['label']}</div>"""
+    )
+
+MARKER_DATA_JS = r"""
+function pacsPopupHtml(d) {
+    var ids = d[9], imgs = d[10], rows = d[11], i, j;
+    var cell = "border:1px solid #000; padding:4px 8px;";
+    var h = "<div style='text-align:center;'><b class='popup-title'>" + d[8] + "</b><br>";
+    h += "<table style='border-collapse:collapse; width:auto; margin:8px auto 0 auto;'><tr>";
+    for (i = 0; i < ids.length; i++) {
+        h += "<td style='padding:4px 8px; text-align:center;'>";
+        if (imgs[i]) {
+            // 확대 이미지가 없으면(base64 원본) data-full을 빼고 src를 그대로 씀 - render_popup_html과 같은 HTML
+            h += "<img src='" + imgs[i][0] + "'" + (imgs[i][1] ? " data-full='" + imgs[i][1] + "'" : "") + " width='120' class='popup-img' "
+                + "style='cursor:zoom-in;display:block;margin:0 auto;'><br>";
+        } else {
+            h += "<div style='width:120px;height:90px;background:#eee;display:flex;align-items:center;justify-content:center;'>이미지 없음</div><br>";
+        }
+        h += "<span style='font-weight:bold'>" + ids[i] + "</span></td>";
+    }
+    h += "</tr></table>";
+    h += "<table style='border-collapse:collapse; width:auto; min-width:" + (120 * ids.length) + "px; margin:8px auto 0 auto;'>";
+    h += "<tr><td style='" + cell + " background:#f0f0f0; font-weight:bold;'>관리번호</td>";
+    for (i = 0; i < ids.length; i++) {
+        h += "<td style='" + cell + " background:#e3f2fd; font-weight:bold;'>" + ids[i] + "</td>";
+    }
+    h += "</tr>";
+    for (j = 0; j < PACS_COLUMNS.length; j++) {
+        h += "<tr><td style='" + cell + " background:#f0f0f0; font-weight:bold;'>" + PACS_COLUMNS[j] + "</td>";
+        for (i = 0; i < ids.length; i++) {
+            h += "<td style='" + cell + "'>" + rows[j][i] + "</td>";
+        }
+        h += "</tr>";
+    }
+    h += "</table><br></div>";
+    return "<div style='width: 100.0%; height: 100.0%;'>" + h + "</div>";
+}
+var pacsCanvas = null;
+// 캔버스 모드: 원과 라벨을 DOM 노드 없이 캔버스에 직접 그림
+var PacsLabelMarker = L.CircleMarker.extend({
+    _updatePath: function() {
+        L.CircleMarker.prototype._updatePath.call(this);
+        var r = this._renderer;
+        if (!r._drawing || !r._ctx || this._empty()) return;
+        var ctx = r._ctx, p = this._point;
+        ctx.save();
+        ctx.fillStyle = this.options.textColor;
+        ctx.font = this.options.fontSize + "px sans-serif";
+        ctx.textAlign = "center";
+        ctx.textBaseline = "middle";
+        ctx.fillText(this.options.label, p.x, p.y);
+        ctx.restore();
+    }
+});
+function pacsMakeMarker(d) {
+    var marker;
+    if (PACS_ENGINE === "canvas") {
+        if (!pacsCanvas) pacsCanvas = L.canvas({padding: 0.5});
+        marker = new PacsLabelMarker([d[0], d[1]], {
+            renderer: pacsCanvas, radius: d[5] / 2, color: "#888", weight: 1.5,
+            fillColor: d[3], fillOpacity: 1, label: d[2], textColor: d[4], fontSize: d[6]
+        });
+    } else {
+        var style = "background-color:" + d[3] + ";color:" + d[4] + ";border-radius:50%;text-align:center;"
+            + "width:" + d[5] + "px;height:" + d[5] + "px;line-height:" + d[5] + "px;font-size:" + d[6] + "px;"
+            + "border:1.5px solid #888;overflow:hidden;white-space:nowrap;";
+        marker = L.marker([d[0], d[1]], {icon: L.divIcon({className: "empty", html: '<div style="' + style + '">' + d[2] + '</div>'})});
+    }
+    // 팝업 내용은 마커를 클릭했을 때 처음 만들어짐
+    marker.bindPopup(function() { return pacsPopupHtml(d); }, {maxWidth: 250});
+    return marker;
+}
+function pacsAddMarkers(data, layers) {
+    var buckets = layers.map(function() { return []; });
+    var markers = [];
+    for (var i = 0; i < data.length; i++) {
+        var marker = pacsMakeMarker(data[i]);
+        marker.pacsLayer = data[i][7];
+        buckets[data[i][7]].push(marker);
+        markers.push(marker);
+    }
+    layers.forEach(function(layer, k) {
+        if (layer.addLayers) {
+            layer.addLayers(buckets[k]);  // 클러스터 그룹은 한 번에 추가
+        } else {
+            buckets[k].forEach(function(marker) { layer.addLayer(marker); });
+        }
+    });
+    return markers;
+}
+document.addEventListener('DOMContentLoaded', function() {
+    pacsMarkers = pacsAddMarkers(PACS_DATA, PACS_LAYERS.map(function(name) { return window[name]; }));
+});
+"""
+
+SEARCH_COLUMNS = ['설치장소', '관리부서', '관리번호']
+
+SEARCH_JS = r"""
+var pacsMarkers = [];
+var pacsCurrentHits = null;
+var pacsGramCache = {};
+function pacsPostings(gram) {
+    // 2글자 색인 목록은 차이값으로 저장되어 있어 처음 쓸 때 풀어둠
+    if (!(gram in pacsGramCache)) {
+        var list = PACS_INDEX.grams[gram] || [], out = [], acc = 0;
+        for (var i = 0; i < list.length; i++) {
+            acc += list[i];
+            out.push(acc);
+        }
+        pacsGramCache[gram] = out;
+    }
+    return pacsGramCache[gram];
+}
+function pacsSearch(q) {
+    // 검색어와 맞는 마커 순번 목록, 검색어가 없으면 null(전체)
+    q = q.trim().toLowerCase();
+    if (!q || !PACS_INDEX) return null;
+    if (/^\d+$/.test(q)) return PACS_INDEX.ids[q] || [];
+    var texts = PACS_INDEX.text, result = [], candidates, i;
+    if (q.length < 2) {
+        candidates = null;
+    } else {
+        candidates = pacsPostings(q.substr(0, 2));
+        for (i = 1; i + 2 <= q.length; i++) {
+            var list = pacsPostings(q.substr(i, 2));
+            if (list.length < candidates.length) candidates = list;
+        }
+    }
+    if (candidates === null) {
+        for (i = 0; i < texts.length; i++) {
+            if (texts[i].indexOf(q) !== -1) result.push(i);
+        }
+    } else {
+        for (i = 0; i < candidates.length; i++) {
+            if (texts[candidates[i]].indexOf(q) !== -1) result.push(candidates[i]);
+        }
+    }
+    return result;
+}
+function pacsShowOnly(hits) {
+    // 레이어별로 보일 마커를 모아 지도에서 뗀 상태로 한 번에 교체
+    var layers = PACS_LAYERS.map(function(name) { return window[name]; });
+    var buckets = layers.map(function() { return []; });
+    var visible = null, i;
+    pacsCurrentHits = hits;
+    if (hits && window.pacsEnsureTiles) pacsEnsureTiles(hits);
+    if (hits) {
+        visible = new Uint8Array(pacsMarkers.length);
+        for (i = 0; i < hits.length; i++) visible[hits[i]] = 1;
+    }
+    for (i = 0; i < pacsMarkers.length; i++) {
+        if (pacsMarkers[i] && (!visible || visible[i])) buckets[pacsMarkers[i].pacsLayer].push(pacsMarkers[i]);
+    }
+    layers.forEach(function(layer, k) {
+        var map = layer._map;
+        if (map) map.removeLayer(layer);
+        layer.clearLayers();
+        if (layer.addLayers) {
+            layer.addLayers(buckets[k]);
+        } else {
+            buckets[k].forEach(function(marker) { layer.addLayer(marker); });
+        }
+        if (map) map.addLayer(layer);
+    });
+}
+"""
+
+def build_search_index(df):
+    # 검색창용 색인 (순번은 df.groupby('마커번호') 순서 = 마커 순서)
+    # ids: 관리번호 정확 일치 + "123" → "123-1", "123-2" 같은 접두 일치
+    # text/grams: 설치장소, 관리부서, 관리번호 소문자 문자열과 그 2글자 색인
+    import pandas as pd
+    ids = {}
+    texts = []
+    grams = {}
+    numbers = df['관리번호'].map(lambda v: str(v).strip().lower()).tolist()
+    fields = [
+        df[col].astype(object).map(lambda v: str(v).strip().lower() if pd.notnull(v) else "").tolist()
+        for col in SEARCH_COLUMNS if col in df.columns
+    ]
+    for i, rows in enumerate(marker_groups(df).values()):
+        for 관리번호 in dict.fromkeys(numbers[r] for r in rows):
+            parts = 관리번호.split('-')
+            for key in dict.fromkeys('-'.join(parts[:k]) for k in range(1, len(parts) + 1)):
+                postings = ids.setdefault(key, [])
+                if not postings or postings[-1] != i:
+                    postings.append(i)
+        values = [field[r] for field in fields for r in rows]
+        text = "\n".join(dict.fromkeys(v for v in values if v))
+        texts.append(text)
+        for gram in dict.fromkeys(text[j:j + 2] for j in range(len(text) - 1)):
+            if "\n" not in gram:
+                grams.setdefault(gram, []).append(i)
+    for gram, postings in grams.items():
+        grams[gram] = [postings[0]] + [b - a for a, b in zip(postings, postings[1:])]
+    return {'ids': ids, 'text': texts, 'grams': grams}
+
+def marker_points(df):
+    # 마커 순서(marker_groups)대로 [(위도, 경도, 라벨, 설치장소)] - 그룹 첫 행 기준
+    lats = df['위도'].tolist()
+    lons = df['경도'].tolist()
+    places = df['설치장소'].map(str).tolist()
+    단수 = df['단수'].tolist()
+    return [
+        (float(lats[rows[0]]), float(lons[rows[0]]), marker_style(marker_no, {'단수': 단수[rows[0]]})['label'], places[rows[0]])
+        for marker_no, rows in marker_groups(df).items()
+    ]
+
+def build_spatial_index(df):
+    # "내 주변" 검색용 격자 색인: 좌표는 1e-6도 정수, cells는 {"i_j": [마커 순번]} (i, j = 위도/경도 // NEAR_CELL_DEG)
+    points = marker_points(df)
+    cells = {}
+    for i, (lat, lon, _, _) in enumerate(points):
+        cells.setdefault(f"{math.floor(lat / NEAR_CELL_DEG)}_{math.floor(lon / NEAR_CELL_DEG)}", []).append(i)
+    return {
+        'cell': NEAR_CELL_DEG,
+        'lat': [round(p[0] * 1e6) for p in points],
+        'lon': [round(p[1] * 1e6) for p in points],
+        'label': [p[2] for p in points],
+        'place': [p[3] for p in points],
+        'cells': cells,
+    }
+
+def distance_m(lat1, lon1, lat2, lon2):
+    # 두 좌표 사이 거리(m, 하버사인)
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    a = math.sin((p2 - p1) / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(a))
+
+def find_colocated_groups(df, tolerance=COLOCATED_TOLERANCE_M):
+    # 마커번호가 다른데 tolerance(m) 안에 겹쳐 있는 마커 묶음 [[(라벨, 설치장소, 위도, 경도), ...], ...]
+    points = marker_points(df)
+    step = tolerance / 111000 * 2  # 격자 칸이 tolerance보다 넓으면 이웃 칸만 비교하면 됨
+    buckets = {}
+    for i, (lat, lon, _, _) in enumerate(points):
+        buckets.setdefault((math.floor(lat / step), math.floor(lon / step)), []).append(i)
+    parent = list(range(len(points)))
+
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for (bi, bj), members in buckets.items():
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for b in buckets.get((bi + di, bj + dj), ()):
+                    for a in members:
+                        if a < b and distance_m(points[a][0], points[a][1], points[b][0], points[b][1]) <= tolerance:
+                            parent[root(b)] = root(a)
+    clusters = {}
+    for i in range(len(points)):
+        clusters.setdefault(root(i), []).append(i)
+    return [
+        [(points[i][2], points[i][3], points[i][0], points[i][1]) for i in members]
+        for members in clusters.values() if len(members) > 1
+    ]
+
+def report_colocated(df, limit=20):
+    # 같은 위치에 찍힌 서로 다른 마커번호를 경고로 출력 (좌표 복사 실수 확인용)
+    clusters = find_colocated_groups(df)
+    profile_count("colocated_groups", len(clusters))
+    if not clusters:
+        return clusters
+    print(f"※ 서로 다른 마커번호가 같은 위치({COLOCATED_TOLERANCE_M:g}m 이내)에 있습니다: {len(clusters)}곳")
+    for cluster in clusters[:limit]:
+        labels = ", ".join(label for label, _, _, _ in cluster)
+        print(f"  {labels} - {cluster[0][1]} ({cluster[0][2]:.6f}, {cluster[0][3]:.6f})")
+    if len(clusters) > limit:
+        print(f"  ... 외 {len(clusters) - limit}곳")
+    print()
+    return clusters
+
+NEARBY_JS = r"""
+var pacsNearLayer = null;
+function pacsDistance(lat1, lon1, lat2, lon2) {
+    var r = Math.PI / 180, p1 = lat1 * r, p2 = lat2 * r;
+    var a = Math.pow(Math.sin((p2 - p1) / 2), 2) + Math.cos(p1) * Math.cos(p2) * Math.pow(Math.sin((lon2 - lon1) * r / 2), 2);
+    return 2 * 6371000 * Math.asin(Math.sqrt(a));
+}
+function pacsNearby(lat, lon, k, radius) {
+    // 격자 칸을 가운데부터 한 겹씩 넓혀 가며 가까운 k개(반경 radius m 이내)를 찾음 - [[마커 순번, 거리(m)], ...]
+    var idx = PACS_NEAR, cell = idx.cell;
+    var ci = Math.floor(lat / cell), cj = Math.floor(lon / cell);
+    var side = cell * 110540 * Math.min(1, Math.cos(lat * Math.PI / 180));
+    var maxRing = Math.ceil(radius / side) + 1;
+    var found = [];
+    for (var ring = 0; ring <= maxRing; ring++) {
+        for (var i = ci - ring; i <= ci + ring; i++) {
+            for (var j = cj - ring; j <= cj + ring; j++) {
+                if (Math.abs(i - ci) !== ring && Math.abs(j - cj) !== ring) continue;
+                var members = idx.cells[i + "_" + j];
+                if (!members) continue;
+                for (var n = 0; n < members.length; n++) {
+                    var m = members[n];
+                    var d = pacsDistance(lat, lon, idx.lat[m] / 1e6, idx.lon[m] / 1e6);
+                    if (d <= radius) found.push([m, d]);
+                }
+            }
+        }
+        // 이 바깥 칸의 점은 ring * side 보다 멀므로, 그 안에 k개가 있으면 끝
+        if (found.length >= k) {
+            found.sort(function(a, b) { return a[1] - b[1]; });
+            if (found[k - 1][1] <= ring * side) break;
+        }
+    }
+    found.sort(function(a, b) { return a[1] - b[1]; });
+    return found.slice(0, k);
+}
+function pacsShowNearby(map, lat, lon) {
+    var box = document.getElementById('nearbyBox');
+    var hits = pacsNearby(lat, lon, PACS_NEARBY_K, PACS_NEARBY_RADIUS);
+    if (pacsNearLayer) map.removeLayer(pacsNearLayer);
+    pacsNearLayer = L.circle([lat, lon], {radius: PACS_NEARBY_RADIUS, color: "#1976d2", weight: 1, fillOpacity: 0.05}).addTo(map);
+    var h = "<b>내 주변 " + hits.length + "개</b> (" + PACS_NEARBY_RADIUS + "m 이내)"
+        + "<span id='nearbyClose' style='float:right;cursor:pointer;'>&times;</span>";
+    for (var n = 0; n < hits.length; n++) {
+        var d = hits[n][1];
+        h += "<div class='nearby-item' data-idx='" + hits[n][0] + "'><b>" + PACS_NEAR.label[hits[n][0]] + "</b> "
+            + PACS_NEAR.place[hits[n][0]] + " <span style='color:#1976d2'>"
+            + (d < 1000 ? Math.round(d) + "m" : (d / 1000).toFixed(1) + "km") + "</span></div>";
+    }
+    box.innerHTML = h;
+    box.style.display = "block";
+    document.getElementById('nearbyClose').onclick = function() {
+        box.style.display = "none";
+        map.removeLayer(pacsNearLayer);
+        pacsNearLayer = null;
+    };
+    box.querySelectorAll('.nearby-item').forEach(function(item) {
+        item.onclick = function() {
+            var i = +item.getAttribute('data-idx'), marker = pacsMarkers[i];
+            map.setView([PACS_NEAR.lat[i] / 1e6, PACS_NEAR.lon[i] / 1e6], Math.max(map.getZoom(), 18));
+            if (marker && marker._map) marker.openPopup();
+        };
+    });
+}
+function pacsLocateNearby(map) {
+    if (!PACS_NEAR) return;
+    map.once('locationfound', function(e) { pacsShowNearby(map, e.latlng.lat, e.latlng.lng); });
+    map.once('locationerror', function(e) { alert("현재 위치를 찾을 수 없습니다: " + e.message); });
+    map.locate({setView: false, enableHighAccuracy: true});
+}
+"""
+
+def add_search_index(m, df=None):
+    # df가 없으면(타일 모드) 색인은 summary.json에서 불러옴
+    import folium
+    html = (
+        "<script>\n"
+        f"var PACS_INDEX = {to_js_json(build_search_index(df)) if df is not None else 'null'};\n"
+        f"var PACS_NEAR = {to_js_json(build_spatial_index(df)) if df is not None else 'null'};\n"
+        f"var PACS_NEARBY_K = {NEARBY_K};\n"
+        f"var PACS_NEARBY_RADIUS = {NEARBY_RADIUS_M};\n"
+        f"{SEARCH_JS}{NEARBY_JS}</script>\n"
+    )
+    m.get_root().html.add_child(folium.Element(html))
+
+def add_marker_registry(m, layers, markers):
+    # html 모드: folium이 만든 마커 변수를 검색용 목록(pacsMarkers)에 등록 - markers: [(마커 변수 이름, 레이어)]
+    import folium
+    html = (
+        "<script>\n"
+        f"var PACS_LAYERS = {to_js_json([fg.get_name() for fg in layers])};\n"
+        f"var PACS_MARKER_VARS = {to_js_json([[name, layer] for name, layer in markers])};\n"
+        "document.addEventListener('DOMContentLoaded', function() {\n"
+        "    PACS_MARKER_VARS.forEach(function(v) {\n"
+        "        var marker = window[v[0]];\n"
+        "        marker.pacsLayer = v[1];\n"
+        "        pacsMarkers.push(marker);\n"
+        "    });\n"
+        "});\n"
+        "</script>\n"
+    )
+    m.get_root().html.add_child(folium.Element(html))
+
+def to_js_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+def add_stream(m, source):
+    # 저장할 때 자리표시(STREAM_TOKEN) 위치에 source(write)가 내용을 직접 쓰게 등록하고 자리표시 문자열을 돌려줌
+    if not hasattr(m, 'pacs_streams'):
+        m.pacs_streams = []
+    m.pacs_streams.append(source)
+    return STREAM_TOKEN.format(len(m.pacs_streams) - 1)
+
+def stream_records(records):
+    # to_js_json(records)와 같은 내용을 STREAM_CHUNK개씩 나눠 씀
+    # records가 FragmentList면 캐시 파일에 저장된 JSON을 묶음만큼만 읽어 그대로 씀
+    def source(write):
+        write("[")
+        for start in range(0, len(records), STREAM_CHUNK):
+            if isinstance(records, FragmentList):
+                chunk = records.json(start, start + STREAM_CHUNK)
+            else:
+                chunk = to_js_json(records[start:start + STREAM_CHUNK])[1:-1]
+            write(chunk if start == 0 else "," + chunk)
+        write("]")
+    return source
+
+def add_marker_data(m, layers, records, columns, engine=RENDER_ENGINE, stream=False):
+    import folium
+    data = add_stream(m, stream_records(records)) if stream else to_js_json(list(records))
+    html = (
+        "<script>\n"
+        f"var PACS_ENGINE = {to_js_json(engine)};\n"
+        f"var PACS_COLUMNS = {to_js_json(columns)};\n"
+        f"var PACS_LAYERS = {to_js_json([fg.get_name() for fg in layers])};\n"
+        f"var PACS_DATA = {data};\n"
+        f"{MARKER_DATA_JS}</script>\n"
+    )
+    m.get_root().html.add_child(folium.Element(html))
+
+TILE_JS = r"""
+var pacsSummary = null;
+var pacsTiles = {};
+function pacsTileLayers() {
+    return PACS_LAYERS.map(function(name) { return window[name]; });
+}
+function pacsLoadTile(key) {
+    if (pacsTiles[key]) return;
+    pacsTiles[key] = "loading";
+    fetch(PACS_TILE_URL + "tiles/" + key + ".json").then(function(r) { return r.json(); }).then(function(tile) {
+        var layers = pacsTileLayers();
+        var buckets = layers.map(function() { return []; });
+        for (var n = 0; n < tile.ids.length; n++) {
+            var marker = pacsMakeMarker(tile.data[n]);
+            marker.pacsLayer = tile.data[n][7];
+            pacsMarkers[tile.ids[n]] = marker;
+            buckets[marker.pacsLayer].push(marker);
+        }
+        pacsTiles[key] = tile.ids;
+        if (pacsCurrentHits) {
+            pacsShowOnly(pacsCurrentHits);  // 검색 중이면 검색 결과에 맞춰 다시 반영
+            return;
+        }
+        layers.forEach(function(layer, k) {
+            if (layer.addLayers) {
+                layer.addLayers(buckets[k]);
+            } else {
+                buckets[k].forEach(function(marker) { layer.addLayer(marker); });
+            }
+        });
+    }).catch(function() { delete pacsTiles[key]; });
+}
+function pacsLoadVisibleTiles(map) {
+    // 화면과 겹치는 타일만 불러오고, 한 번 불러온 타일은 메모리에 유지
+    var b = map.getBounds().pad(0.2), deg = pacsSummary.tile_deg;
+    var i0 = Math.floor(b.getSouth() / deg), i1 = Math.floor(b.getNorth() / deg);
+    var j0 = Math.floor(b.getWest() / deg), j1 = Math.floor(b.getEast() / deg);
+    pacsSummary.tiles.forEach(function(key) {
+        var ij = key.split("_"), i = +ij[0], j = +ij[1];
+        if (i >= i0 && i <= i1 && j >= j0 && j <= j1) pacsLoadTile(key);
+    });
+}
+function pacsEnsureTiles(hits) {
+    // 검색 결과가 들어 있는 타일은 화면 밖이어도 불러옴
+    if (!pacsSummary) return;
+    for (var i = 0; i < hits.length; i++) {
+        pacsLoadTile(pacsSummary.tiles[pacsSummary.tile_of[hits[i]]]);
+    }
+}
+document.addEventListener('DOMContentLoaded', function() {
+    var map = null;
+    for (var key in window) {
+        if (key.startsWith("map_") && window[key] instanceof L.Map) map = window[key];
+    }
+    fetch(PACS_TILE_URL + "summary.json").then(function(r) { return r.json(); }).then(function(summary) {
+        pacsSummary = summary;
+        PACS_INDEX = summary.index;
+        PACS_NEAR = summary.near;
+        pacsLoadVisibleTiles(map);
+        map.on('moveend', function() { pacsLoadVisibleTiles(map); });
+    });
+});
+"""
+
+def write_if_changed(path, text):
+    # 내용이 같으면 다시 쓰지 않음 (수정시각, 업로드 비교를 그대로 유지)
+    data = text.encode("utf-8")
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except OSError:
+        pass
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+    return True
+
+def write_marker_tiles(records, df, columns, out_dir):
+    # 마커 레코드를 위도/경도 격자(TILE_DEG) 타일 파일로 나누고, 범례·검색용 전체 요약(summary.json)을 씀
+    tiles = {}
+    for idx, record in enumerate(records):
+        key = f"{math.floor(record[0] / TILE_DEG)}_{math.floor(record[1] / TILE_DEG)}"
+        tiles.setdefault(key, []).append(idx)
+    keys = sorted(tiles)
+    tile_dir = os.path.join(out_dir, "tiles")
+    os.makedirs(tile_dir, exist_ok=True)
+    changed = 0
+    for key in keys:
+        tile = {'ids': tiles[key], 'data': [records[idx] for idx in tiles[key]]}
+        changed += write_if_changed(os.path.join(tile_dir, f"{key}.json"), to_js_json(tile))
+    for name in os.listdir(tile_dir):
+        if name.endswith(".json") and name[:-5] not in tiles:
+            os.remove(os.path.join(tile_dir, name))
+    tile_of = [0] * len(records)
+    for n, key in enumerate(keys):
+        for idx in tiles[key]:
+            tile_of[idx] = n
+    summary = {
+        'tile_deg': TILE_DEG, 'columns': columns, 'legend': legend_counts(df),
+        'tiles': keys, 'counts': [len(tiles[key]) for key in keys], 'tile_of': tile_of,
+        'index': build_search_index(df),
+        'near': build_spatial_index(df),
+    }
+    write_if_changed(os.path.join(out_dir, "summary.json"), to_js_json(summary))
+    print(f"타일 {len(keys)}개 중 {changed}개를 새로 썼습니다: {out_dir}")
+
+def add_tile_loader(m, layers, columns, data_url, engine=RENDER_ENGINE):
+    import folium
+    html = (
+        "<script>\n"
+        f"var PACS_ENGINE = {to_js_json(engine)};\n"
+        f"var PACS_COLUMNS = {to_js_json(columns)};\n"
+        f"var PACS_LAYERS = {to_js_json([fg.get_name() for fg in layers])};\n"
+        "var PACS_DATA = [];\n"
+        f"var PACS_TILE_URL = {to_js_json(data_url)};\n"
+        f"{MARKER_DATA_JS}{TILE_JS}</script>\n"
+    )
+    m.get_root().html.add_child(folium.Element(html))
+
+def make_layers(m, engine=RENDER_ENGINE):
+    import folium
+    from folium.plugins import MarkerCluster
+    if engine == "cluster":
+        # 낮은 줌에서는 레이어별로 묶고, 기존 마커 색상을 클러스터 아이콘에도 사용
+        return [
+            MarkerCluster(
+                name=name,
+                icon_create_function=CLUSTER_ICON_JS % (color, get_marker_text_color(color)),
+                disable_clustering_at_zoom=17,
+            ).add_to(m)
+            for name, color in zip(LAYER_NAMES, LAYER_COLORS)
+        ]
+    return [folium.FeatureGroup(name=name).add_to(m) for name in LAYER_NAMES]
+
+def group_cache_key(row_hashes, ids, images, settings):
+    # 마커 그룹의 행 해시 + 사진(내용 해시 경로 또는 원본 파일 상태) + 생성 설정으로 만든 키
+    # ids는 photo_keys() 값 (전체 지도는 (구역, 관리번호))
+    h = hashlib.sha256(settings.encode())
+    h.update(row_hashes.tobytes())
+    for key in ids:
+        관리번호 = key[-1] if isinstance(key, tuple) else key
+        if images is not None:
+            h.update(repr(images.get(key)).encode())
+        else:
+            image_path = f"{IMAGES_DIR}/{관리번호}.jpg"
+            if os.path.exists(image_path):
+                st = os.stat(image_path)
+                h.update(f"{st.st_size}:{st.st_mtime_ns}".encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def render_marker_fragments(df, images=None, lazy=True):
+    # {마커번호: 조각} - lazy면 JSON 레코드, 아니면 [위도, 경도, 레이어, 아이콘 HTML, 팝업 HTML]
+    # lazy 레코드: [위도, 경도, 라벨, 배경색, 글자색, 크기, 폰트크기, 레이어, 설치장소, 관리번호목록, 사진목록, 칼럼값]
+    lats = df['위도'].tolist()
+    lons = df['경도'].tolist()
+    단수 = df['단수'].tolist()
+    labels = [str(col) for col in popup_columns(df)]
+    fragments = {}
+    for marker_no, (rows, place, ids, imgs, values) in prepare_popup_data(df, images).items():
+        r = rows[0]
+        style = marker_style(marker_no, {'단수': 단수[r]})
+        if lazy:
+            fragments[marker_no] = [
+                float(lats[r]), float(lons[r]), style['label'], style['bg'], style['fg'],
+                style['size'], style['font_size'], style['layer'], place, ids,
+                [0 if img is None else [img[0]] if img[1] is None else list(img) for img in imgs],
+                values,
+            ]
+        else:
+            fragments[marker_no] = [
+                float(lats[r]), float(lons[r]), style['layer'], make_icon_html(style),
+                render_popup_html(place, ids, imgs, values, labels),
+            ]
+    return fragments
+
+def pool_imap(pool, func, *iterables, ahead=8):
+    # pool.map과 같지만 결과를 기다리는 작업을 ahead개까지만 미리 넣음 (입력과 결과가 한꺼번에 메모리에 쌓이지 않음)
+    pending = collections.deque()
+    for args in zip(*iterables):
+        pending.append(pool.submit(func, *args))
+        if len(pending) >= ahead:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def iter_marker_fragments(df, groups, marker_nos, images=None, lazy=True, workers=WORKERS):
+    # marker_nos 그룹들의 조각을 묶음(최대 STREAM_CHUNK 그룹)마다 {마커번호: 조각}으로 내보냄
+    # workers > 1이면 묶음을 번갈아(i, i+n, i+2n, ...) 나눠 프로세스 풀에서 만듦
+    # 번갈아 나누면 한 구역에 몰린 큰 그룹들이 한 묶음에 모이지 않아 작업량이 고르게 나뉨
+    # 각 그룹의 조각은 다른 그룹과 무관하게 정해지므로 순차 처리와 결과가 같음
+    import numpy as np
+    if not marker_nos:
+        return
+    parallel = workers > 1 and len(marker_nos) >= PARALLEL_MIN_GROUPS
+    n_chunks = max(workers * 4 if parallel else 1, -(-len(marker_nos) // STREAM_CHUNK))
+    n_chunks = min(n_chunks, len(marker_nos))
+    if parallel:
+        chunks = [marker_nos[i::n_chunks] for i in range(n_chunks)]
+    else:
+        size = -(-len(marker_nos) // n_chunks)
+        chunks = [marker_nos[i:i + size] for i in range(0, len(marker_nos), size)]
+    frames = (df.iloc[np.sort(np.concatenate([groups[marker_no] for marker_no in chunk]))] for chunk in chunks)
+    if not parallel:
+        for frame in frames:
+            yield render_marker_fragments(frame, images, lazy)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool_imap(pool, render_marker_fragments, frames, [images] * n_chunks, [lazy] * n_chunks,
+                             ahead=workers * 2)
+
+def render_marker_fragments_parallel(df, groups, marker_nos, images=None, lazy=True, workers=WORKERS):
+    # iter_marker_fragments 결과를 {마커번호: 조각} 하나로 합침
+    fragments = {}
+    for part in iter_marker_fragments(df, groups, marker_nos, images, lazy, workers):
+        fragments.update(part)
+    return fragments
+
+def make_marker(fragment):
+    import folium
+    lat, lon, layer, icon_html, popup_html = fragment
+    return folium.Marker(
+        location=[lat, lon],
+        icon=folium.DivIcon(html=icon_html),
+        popup=folium.Popup(popup_html, max_width=250)
+    )
+
+def render_marker_scripts(layer_name, fragments, marker_ids):
+    # 조각으로 마커를 만들어 렌더링한 스크립트 목록 - 부모는 이름(layer_name)만 같은 임시 요소라 프로세스 풀에서도 실행 가능
+    # 스크립트 순서와 변수 이름(marker_<id>)은 마커를 레이어에 미리 붙여 m.save() 했을 때와 같음
+    from branca.element import Element, Figure
+    figure = Figure()
+    layer = Element()
+    layer.get_name = lambda: layer_name
+    figure.add_child(layer)
+    scripts = []
+    for fragment, marker_id in zip(fragments, marker_ids):
+        marker = make_marker(fragment)
+        marker._id = marker_id
+        layer.add_child(marker)
+        marker.render()
+        scripts.extend(element.render() for element in figure.script._children.values())
+        figure.script._children.clear()
+        del layer._children[marker.get_name()]
+    return scripts
+
+def stream_markers(m, layer, fragments, positions, marker_ids, workers=1):
+    # html 모드: 레이어의 마커(fragments[positions])를 저장할 때 묶음별로 읽어 렌더링하고 바로 씀
+    # workers > 1이면 묶음을 프로세스 풀에서 렌더링 - 어느 쪽이든 메모리에는 몇 묶음만 있음
+    from branca.element import Element
+    container = Element()
+    container.add_child(Element("@"))
+    sep = container.render().split("@")[0]
+    parallel = workers > 1 and len(positions) >= PARALLEL_MIN_GROUPS
+    size = max(1, min(STREAM_CHUNK, -(-len(positions) // (workers * 4)))) if parallel else STREAM_CHUNK
+    starts = range(0, len(positions), size)
+    names = [layer.get_name()] * len(starts)
+    chunk_ids = [marker_ids[i:i + size] for i in starts]
+
+    def source(write):
+        chunks = ([fragments[n] for n in positions[i:i + size]] for i in starts)
+        with contextlib.ExitStack() as stack:
+            if parallel:
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                results = pool_imap(pool, render_marker_scripts, names, chunks, chunk_ids, ahead=workers * 2)
+            else:
+                results = map(render_marker_scripts, names, chunks, chunk_ids)
+            for k, scripts in enumerate(results):
+                write((sep if k else "") + sep.join(scripts))
+    return source
+
+def add_stream_placeholder(m, layer, token):
+    # 레이어 스크립트 바로 뒤(원래 첫 마커 스크립트가 올 자리)에 자리표시를 넣음
+    from branca.element import MacroElement
+    from jinja2 import Template
+    placeholder = MacroElement()
+    placeholder._template = Template("{% macro script(this, kwargs) %}" + token + "{% endmacro %}")
+    layer.add_child(placeholder)
+
+def fragment_layer(fragment, lazy):
+    return fragment[7] if lazy else fragment[2]
+
+def add_markers_to_map(m, df, images=None, popup_mode=POPUP_MODE, engine=RENDER_ENGINE, cache=None, workers=WORKERS, tiles_dir=None,
+                       stream=False):
+    # stream=True면 마커 자리에 자리표시만 넣으므로 m은 save_map으로만 저장해야 함 (m.save()로는 깨진 페이지가 나옴)
+    # cache(FragmentStore)가 주어지면 조각을 디스크에 쓰고 키 목록(FragmentList)만 들고 다니므로,
+    # stream과 함께 쓰면 조각 전체가 한꺼번에 메모리에 올라오지 않음 (저장할 때 묶음씩 읽음)
+    import pandas as pd
+    layers = make_layers(m, engine)
+
+    groups = marker_groups(df)
+    # 캔버스 마커와 타일 출력은 브라우저에서 마커를 만들어야 하므로 항상 lazy 데이터 방식 사용
+    lazy = popup_mode == "lazy" or engine == "canvas" or tiles_dir is not None
+    if cache is None:
+        found = render_marker_fragments_parallel(df, groups, list(groups), images, lazy, workers)
+        fragments = [found[marker_no] for marker_no in groups]
+        layer_of = [fragment_layer(fragment, lazy) for fragment in fragments]
+        missing = groups
+    else:
+        # {그룹 키: 조각} 저장소에서 바뀌지 않은 그룹을 재사용하고, 이번에 쓰는 조각만 새 파일에 남김
+        settings = json.dumps([CURRENT_VERSION, pd.__version__, lazy, [str(c) for c in df.columns]], ensure_ascii=False)
+        row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        ids = photo_keys(df)
+        keys = {
+            marker_no: group_cache_key(row_hashes[rows], [ids[r] for r in rows], images, settings)
+            for marker_no, rows in groups.items()
+        }
+        missing = [marker_no for marker_no in groups if keys[marker_no] not in cache]
+        with cache.rewrite() as writer:
+            for marker_no in groups:
+                if keys[marker_no] in cache:
+                    writer.copy(cache, keys[marker_no])
+            for part in iter_marker_fragments(df, groups, missing, images, lazy, workers):
+                for marker_no, fragment in part.items():
+                    writer.add(keys[marker_no], fragment, fragment_layer(fragment, lazy))
+        fragments = FragmentList(cache, [keys[marker_no] for marker_no in groups])
+        layer_of = fragments.layers()
+        print(f"마커 {len(fragments)}개 중 {len(missing)}개를 새로 만들었습니다.")
+    profile_count("groups", len(groups))
+    profile_count("groups_rendered", len(missing))
+    if PROFILE is not None:
+        if lazy:
+            profile_count("marker_data_bytes", FragmentList.json_bytes(fragments))
+        else:
+            profile_count("popup_html_bytes", sum(len(fragment[4].encode()) for fragment in fragments))
+
+    columns = [str(col) for col in popup_columns(df)]
+    if tiles_dir is not None:
+        write_marker_tiles(fragments, df, columns, tiles_dir)
+        add_tile_loader(m, layers, columns, os.path.basename(os.path.normpath(tiles_dir)) + "/", engine)
+        return tuple(layers)
+    if lazy:
+        add_marker_data(m, layers, fragments, columns, engine, stream)
+        return tuple(layers)
+    markers = []
+    if stream:
+        # 마커 객체는 저장할 때 만들고, 변수 이름만 미리 정해 검색 목록에 등록
+        by_layer = [([], []) for _ in layers]
+        for n, layer_no in enumerate(layer_of):
+            marker_id = uuid.uuid4().hex
+            by_layer[layer_no][0].append(n)
+            by_layer[layer_no][1].append(marker_id)
+            markers.append((f"marker_{marker_id}", layer_no))
+        for layer, (positions, marker_ids) in zip(layers, by_layer):
+            if positions:
+                source = stream_markers(m, layer, fragments, positions, marker_ids, workers)
+                add_stream_placeholder(m, layer, add_stream(m, source))
+    else:
+        for fragment in fragments:
+            marker = make_marker(fragment)
+            layers[fragment[2]].add_child(marker)
+            markers.append((marker.get_name(), fragment[2]))
+    add_marker_registry(m, layers, markers)
+    return tuple(layers)
+
+def add_generated_time(m):
+    import folium
+    now = datetime.datetime.now()
+    time_str = f"작성시점 : {now.year}년 {now.month:02d}월 {now.day:02d}일 {now.hour:02d}시 {now.minute:02d}분"
+    html = f"""<div style="position: fixed;right: 30px;bottom: 18px;background: rgba(255,255,255,0.85);color: #222;font-size: 13px;border-radius: 7px;padding: 4px 14px;box-shadow: 1px 2px 8px #bbb;z-index: 9999;pointer-events: none;">{time_str}</div>"""
+    m.get_root().html.add_child(folium.Element(html))
+
+def make_map(df, images=None, popup_mode=POPUP_MODE, engine=RENDER_ENGINE, cache=None, workers=WORKERS, tiles_dir=None,
+             tile_proxy=None, stream=False):
+    import folium
+    from folium.plugins import LocateControl, MeasureControl
+    print("지도 작성 중 ...")
+    center_lat = df.iloc[0]['위도']
+    center_lon = df.iloc[0]['경도']
+    m = folium.Map(location=[center_lat, center_lon], zoom_start=13, max_zoom=21, tiles=None)
+    LocateControl(auto_start=False, flyTo=True, keepCurrentZoomLevel=True).add_to(m)
+    MeasureControl(primary_length_unit='meters', primary_area_unit='sqmeters').add_to(m)
+    for layer in TILE_LAYERS:
+        # tile_proxy가 주어지면 원본 대신 로컬 캐시 프록시(tile-proxy 명령)에서 타일을 받음
+        url = f"{tile_proxy}/tiles/{layer['key']}/{{z}}/{{x}}/{{y}}" if tile_proxy else layer['url']
+        folium.TileLayer(
+            tiles=url,
+            attr=layer['attr'],
+            name=layer['name'],
+            overlay=layer['overlay'],
+            control=True,
+            **layer.get('options', {})
+        ).add_to(m)
+    with profile_stage("add_markers_to_map"):
+        fg1, fg2, fg_install, fg_remove, fg_change = add_markers_to_map(m, df, images, popup_mode, engine, cache, workers, tiles_dir, stream)
+    with profile_stage("add_search_index"):
+        add_search_index(m, df if tiles_dir is None else None)
+    add_generated_time(m)
+    return m
+
+def legend_counts(df):
+    # 범례 개수: 1단, 2단, 설치예정, 철거예정, 변경예정
+    df_normal = df[~df['마커번호'].astype(str).str.startswith(('설치예정', '철거예정', '변경예정'))]
+    count_1 = ((df_normal['단수'] == 1)).sum()
+    count_2 = ((df_normal['단수'] == 2)).sum() // 2
+
+    count_install = df['마커번호'].astype(str).str.startswith('설치예정').sum()
+    count_remove = df['마커번호'].astype(str).str.startswith('철거예정').sum()
+    count_change = df['마커번호'].astype(str).str.startswith('변경예정').sum()
+    return [int(count_1), int(count_2), int(count_install), int(count_remove), int(count_change)]
+
+def add_legend_and_controls(m, df):
+    # 범례에 신규 마커 추가, "범례"만 가운데 정렬
+    import folium
+    count_1, count_2, count_install, count_remove, count_change = legend_counts(df)
+
+    legend_html = f"""
+    <div id="legend" style="position: fixed; bottom: 50px; left: 50px; width: 160px; height: 140px; background-color: white; border:2px solid grey; z-index:9999; font-size:14px; padding: 10px; text-align:left;">
+        <div style="text-align:center; font-weight:bold;">범례</div>
+        <i style="background:blue; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 1단 - {count_1}개<br>
+        <i style="background:red; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 2단 - {count_2}개<br>
+        <i style="background:yellow; width:15px; height:15px; display:inline-block; border-radius:50%; border:1px solid #888;"></i> 설치예정 - {count_install}개<br>
+        <i style="background:#ff9800; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 철거예정 - {count_remove}개<br>
+        <i style="background:#a259e6; width:15px; height:15px; display:inline-block; border-radius:50%;"></i> 변경예정 - {count_change}개<br>
+    </div>
+    """
+    m.get_root().html.add_child(folium.Element(legend_html))
+    folium.LayerControl(collapsed=False).add_to(m)
+
+def add_custom_js_css(m):
+    import folium
+    custom_js_css = r"""<style>
+#showLatLngBtn {position: fixed;top: 20px;left: 50px;z-index: 9999;background: #1976d2;color: white;border: none;border-radius: 5px;padding: 8px 16px;font-size: 14px;cursor: pointer;box-shadow: 1px 2px 8px #888;}
+#toggleBtns {position: fixed;top: 20px;left: 210px;z-index: 9999;display: flex;gap: 8px;}
+#hideAllBtn, #showAllBtn {background: #e53935;color: white;border: none;border-radius: 5px;padding: 8px 16px;font-size: 14px;cursor: pointer;box-shadow: 1px 2px 8px #888;}
+#showAllBtn {background: #1976d2;margin-left: 0;}
+#searchBox {position: fixed;top: 70px;left: 50px;z-index: 9999;background: white;border: 1px solid #aaa;border-radius: 5px;padding: 8px 12px;width: 300px;box-shadow: 1px 2px 8px #888;}
+#nearbyBox {display: none;position: fixed;top: 125px;left: 50px;z-index: 9999;background: white;border: 1px solid #aaa;border-radius: 5px;padding: 8px 12px;width: 300px;max-height: 50vh;overflow-y: auto;box-shadow: 1px 2px 8px #888;font-size: 13px;}
+.nearby-item {padding: 4px 0;border-top: 1px solid #eee;cursor: pointer;}
+#imgOverlay {display: none;position: fixed;z-index: 10000;left: 0; top: 0; width: 100vw; height: 100vh;background: rgba(0,0,0,0.7);justify-content: center; align-items: center;}
+#imgOverlay img {max-width: 90vw; max-height: 80vh; border: 5px solid #fff; border-radius: 8px;}
+#imgOverlayClose {position: absolute; top: 30px; right: 40px; color: #fff; font-size: 2em; cursor: pointer;}
+</style>
+<button id="showLatLngBtn" class="search-btn">위/경도 표시</button>
+<span id="toggleBtns">
+    <button id="hideAllBtn">모두 감추기</button>
+    <button id="showAllBtn" style="display:none;">모두 보이기</button>
+</span>
+<div id="searchBox">
+    <input id="searchInput" type="text" placeholder="설치장소, 관리부서, 관리번호 검색">
+    <button id="searchBtn" class="search-btn">검색</button>
+    <button id="resetBtn" class="search-btn" style="margin-left:6px;">필터초기화</button>
+    <button id="nearbyBtn" class="search-btn" style="margin-left:6px;">내 주변</button>
+</div>
+<div id="nearbyBox"></div>
+<div id="imgOverlay" onclick="this.style.display='none'">
+    <span id="imgOverlayClose" onclick="document.getElementById('imgOverlay').style.display='none';event.stopPropagation();">&times;</span>
+    <img id="imgOverlayImg" src="">
+</div>
+<script>
+var latlngPopupActive = false;
+var latlngPopup;
+document.addEventListener('DOMContentLoaded', function() {
+    setTimeout(function() {
+        for (var key in window) {
+            if (key.startsWith("map_") && window[key] instanceof L.Map) {
+                window.map = window[key];
+            }
+        }
+        if (window.map) {
+            window.map.on('click', function(e) {
+                if (!latlngPopupActive) return;
+                if (latlngPopup) window.map.closePopup(latlngPopup);
+                latlngPopup = L.popup()
+                    .setLatLng(e.latlng)
+                    .setContent("위도: " + e.latlng.lat.toFixed(6) + "<br>경도: " + e.latlng.lng.toFixed(6))
+                    .openOn(window.map);
+            });
+        }
+        var showLatLngBtn = document.getElementById('showLatLngBtn');
+        if (showLatLngBtn) {
+            showLatLngBtn.onclick = function() {
+                latlngPopupActive = !latlngPopupActive;
+                this.innerText = latlngPopupActive ? "위/경도 끄기" : "위/경도 표시";
+                if (!latlngPopupActive && latlngPopup && window.map) {
+                    window.map.closePopup(latlngPopup);
+                }
+            };
+        }
+        var searchBtn = document.getElementById('searchBtn');
+        var resetBtn = document.getElementById('resetBtn');
+        var searchInput = document.getElementById('searchInput');
+        var searchFrame = null;
+        function filterMarkers() {
+            searchFrame = null;
+            pacsShowOnly(pacsSearch(searchInput.value));
+        }
+        if (searchBtn) searchBtn.onclick = filterMarkers;
+        if (searchInput) {
+            searchInput.onkeydown = function(e) {
+                if (e.key === "Enter") filterMarkers();
+            };
+            // 입력할 때마다 검색 (한 프레임에 한 번만 반영)
+            searchInput.oninput = function() {
+                if (searchFrame === null) searchFrame = requestAnimationFrame(filterMarkers);
+            };
+        }
+        if (resetBtn) resetBtn.onclick = function() {
+            searchInput.value = "";
+            pacsShowOnly(null);
+        };
+        var nearbyBtn = document.getElementById('nearbyBtn');
+        if (nearbyBtn && window.map) nearbyBtn.onclick = function() { pacsLocateNearby(window.map); };
+    }, 300);
+    var hideBtn = document.getElementById('hideAllBtn');
+    var showBtn = document.getElementById('showAllBtn');
+    hideBtn.onclick = function() {
+        document.getElementById('showLatLngBtn').style.display = 'none';
+        document.getElementById('searchBox').style.display = 'none';
+        document.getElementById('nearbyBox').style.display = 'none';
+        var legend = document.getElementById('legend');
+        if (legend) legend.style.display = 'none';
+        var layerControls = document.getElementsByClassName('leaflet-control-layers');
+        for (var i = 0; i < layerControls.length; i++) {
+            layerControls[i].style.display = 'none';
+        }
+        hideBtn.style.display = 'none';
+        showBtn.style.display = '';
+    };
+    showBtn.onclick = function() {
+        document.getElementById('showLatLngBtn').style.display = '';
+        document.getElementById('searchBox').style.display = '';
+        var legend = document.getElementById('legend');
+        if (legend) legend.style.display = '';
+        var layerControls = document.getElementsByClassName('leaflet-control-layers');
+        for (var i = 0; i < layerControls.length; i++) {
+            layerControls[i].style.display = '';
+        }
+        hideBtn.style.display = '';
+        showBtn.style.display = 'none';
+    };
+});
+document.addEventListener('click', function(e) {
+    if (e.target.tagName === 'IMG' && e.target.classList.contains('popup-img')) {
+        var overlay = document.getElementById('imgOverlay');
+        var overlayImg = document.getElementById('imgOverlayImg');
+        overlayImg.src = e.target.getAttribute('data-full') || e.target.src;
+        overlay.style.display = 'flex';
+        e.stopPropagation();
+    }
+});
+</script>
+"""
+    m.get_root().html.add_child(folium.Element(custom_js_css))
+
+class FragmentStore:
+    # 마커 조각 캐시: 조각마다 JSON 한 줄(to_js_json)을 파일에 이어 쓰고, 메모리에는 {그룹 키: [위치, 길이, 레이어]}만 둠
+    # 빌드마다 rewrite()로 이번에 쓰는 조각만 새 파일에 모으고, 저장소가 그 파일을 가리키게 바꿈
+    def __init__(self, path=None, index=None):
+        self.path = path
+        self.index = index or {}
+        self.file = None
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def read_json(self, key):
+        offset, length, _ = self.index[key]
+        if self.file is None:
+            self.file = open(self.path, "rb")
+        self.file.seek(offset)
+        return self.file.read(length).decode("utf-8")
+
+    def read(self, key):
+        return json.loads(self.read_json(key))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @contextlib.contextmanager
+    def rewrite(self):
+        # 새 파일(CACHE_DIR/fragments_<임의>.jsonl)에 조각을 쓰는 writer를 주고, 끝나면 저장소를 새 파일로 바꿈
+        # 예전 파일은 save_build_cache가 새 색인을 저장한 뒤에 지움 (중간에 멈춰도 예전 캐시는 그대로)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = os.path.join(CACHE_DIR, f"fragments_{uuid.uuid4().hex[:16]}.jsonl")
+        writer = FragmentWriter(path)
+        try:
+            yield writer
+        finally:
+            writer.file.close()
+        self.close()
+        self.path, self.index = path, writer.index
+
+class FragmentWriter:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.index = {}
+
+    def write(self, key, data, layer):
+        self.index[key] = [self.file.tell(), len(data), layer]
+        self.file.write(data + b"\n")
+
+    def add(self, key, fragment, layer):
+        self.write(key, to_js_json(fragment).encode("utf-8"), layer)
+
+    def copy(self, store, key):
+        self.write(key, store.read_json(key).encode("utf-8"), store.index[key][2])
+
+class FragmentList:
+    # 저장소의 조각을 마커 순서대로 보여주는 읽기 전용 목록 - 꺼낼 때마다 파일에서 읽으므로 전체를 메모리에 두지 않음
+    def __init__(self, store, keys):
+        self.store = store
+        self.keys = keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, n):
+        if isinstance(n, slice):
+            return [self.store.read(key) for key in self.keys[n]]
+        return self.store.read(self.keys[n])
+
+    def __iter__(self):
+        return (self.store.read(key) for key in self.keys)
+
+    def layers(self):
+        return [self.store.index[key][2] for key in self.keys]
+
+    def json(self, start, stop):
+        # to_js_json(self[start:stop])[1:-1]과 같은 문자열 (저장된 JSON을 그대로 이어 붙임)
+        return ",".join(self.store.read_json(key) for key in self.keys[start:stop])
+
+    @staticmethod
+    def json_bytes(fragments):
+        # to_js_json(list(fragments))의 UTF-8 길이
+        if not isinstance(fragments, FragmentList):
+            return len(to_js_json(list(fragments)).encode())
+        return sum(fragments.store.index[key][1] for key in fragments.keys) + max(len(fragments) - 1, 0) + 2
+
+def build_cache_path(filename=FILENAME):
+    # 출력 HTML마다 따로 저장 (batch로 여러 지도를 만들어도 서로 덮어쓰지 않음)
+    name = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()[:12]
+    return os.path.join(CACHE_DIR, f"build_{name}.json")
+
+def load_build_cache(filename=FILENAME):
+    # {'fingerprint', 'outputs', 'fragments': FragmentStore} - 조각 파일이 없거나 형식이 다르면 빈 저장소
+    try:
+        with open(build_cache_path(filename), encoding="utf-8") as f:
+            cache = json.load(f)
+        fragments = cache.get('fragments')
+        path = os.path.join(CACHE_DIR, fragments['file']) if fragments else None
+        cache['fragments'] = FragmentStore(path, fragments['index']) if path and os.path.exists(path) else FragmentStore()
+        return cache
+    except Exception:
+        return {'fingerprint': None, 'fragments': FragmentStore()}
+
+def save_build_cache(cache, filename=FILENAME):
+    # 색인을 먼저 바꿔 쓴 뒤, 이 색인이 가리키던 예전 조각 파일을 지움
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = build_cache_path(filename)
+    store = cache['fragments']
+    old = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            old = json.load(f).get('fragments', {}).get('file')
+    except Exception:
+        pass
+    data = dict(cache, fragments={'file': os.path.basename(store.path), 'index': store.index} if store.path else None)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    store.close()
+    if old and store.path and old != os.path.basename(store.path):
+        try:
+            os.remove(os.path.join(CACHE_DIR, old))
+        except OSError:
+            pass
+
+def input_fingerprint(workbook, images_dir, options):
+    # 엑셀 내용, 사진 폴더 상태, 생성 옵션이 같으면 같은 값
+    h = hashlib.sha256(json.dumps([CURRENT_VERSION, options], ensure_ascii=False).encode())
+    h.update(file_hash(workbook).encode())
+    if os.path.isdir(images_dir):
+        for entry in sorted(os.scandir(images_dir), key=lambda e: e.name):
+            if entry.is_file():
+                st = entry.stat()
+                h.update(f"{entry.name}:{st.st_size}:{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+# 따옴표는 ', ", 또는 JS 문자열 안의 \" - 값에 따옴표나 +가 있으면(JS로 이어 붙이는 코드) 건드리지 않음
+STYLE_ATTR_RE = re.compile(r"""style=(\\?["'])([^"'\\<>+\n]+)\1""")
+CLASS_PAIR_RE = re.compile(r"""class=(\\?["'])([^"'\\<>\n]*)\1\s*class=\1([^"'\\<>\n]*)\1""")
+BLOCK_RE = re.compile(r"(<script\b[^>]*>)(.*?)(</script>)|(<style\b[^>]*>)(.*?)(</style>)", re.S | re.I)
+
+def dedupe_inline_styles(html):
+    # 반복되는 인라인 style 속성(팝업 칸, DivIcon 등)을 공용 클래스(ps0, ps1, ...)로 바꾸고 <head>에 CSS 추가
+    counts = {}
+    for match in STYLE_ATTR_RE.finditer(html):
+        counts[match.group(2)] = counts.get(match.group(2), 0) + 1
+    classes = {}
+    for style, count in sorted(counts.items(), key=lambda item: -item[1] * len(item[0])):
+        if count >= STYLE_CLASS_MIN_COUNT and len(style) > 8:
+            classes[style] = f"ps{len(classes)}"
+    if not classes:
+        return html
+
+    def replace(match):
+        name = classes.get(match.group(2))
+        return f"class={match.group(1)}{name}{match.group(1)}" if name else match.group(0)
+
+    html = STYLE_ATTR_RE.sub(replace, html)
+    # 원래 class 속성이 있던 태그는 두 class 속성을 하나로 합침
+    html = CLASS_PAIR_RE.sub(r"class=\1\2 \3\1", html)
+    css = "".join(f".{name}{{{style.strip()}}}" for style, name in classes.items())
+    head_end = html.find("</head>")
+    return html[:head_end] + f"<style>{css}</style>\n" + html[head_end:]
+
+def minify_html(html):
+    # 줄 앞뒤 공백, 빈 줄, 한 줄짜리 // 주석, CSS 주석을 지움
+    # 줄바꿈은 남겨 두므로 세미콜론이 빠진 JS(자동 세미콜론 삽입)도 그대로 동작함
+    def lines(text, comments):
+        out = []
+        for line in text.split("\n"):
+            line = line.strip()
+            if line and not (comments and line.startswith("//")):
+                out.append(line)
+        return "\n".join(out)
+
+    def block(match):
+        if match.group(1):
+            return match.group(1) + lines(match.group(2), True) + match.group(3)
+        css = re.sub(r"/\*.*?\*/", "", match.group(5), flags=re.S)
+        return match.group(4) + re.sub(r"\s*\n\s*", "", css) + match.group(6)
+
+    parts = []
+    pos = 0
+    for match in BLOCK_RE.finditer(html):
+        parts.append(lines(html[pos:match.start()], False))
+        parts.append(block(match))
+        pos = match.end()
+    parts.append(lines(html[pos:], False))
+    return "\n".join(part for part in parts if part)
+
+COMPRESSED_EXTS = (".gz", ".br")
+
+def remove_compressed(filename, exts=COMPRESSED_EXTS):
+    # 이전 --optimize 빌드가 남긴 압축본 삭제 - 남아 있으면 정적 서버가 옛 페이지를 내보냄
+    for ext in exts:
+        if os.path.exists(filename + ext):
+            os.remove(filename + ext)
+
+def write_compressed(filename, data):
+    # 미리 압축한 파일(.gz, 설치되어 있으면 .br)을 옆에 저장 - 정적 서버의 gzip_static/brotli_static 용
+    sizes = {}
+    with open(filename + ".gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    sizes['gz'] = os.path.getsize(filename + ".gz")
+    try:
+        import brotli
+    except ImportError:
+        print("brotli 모듈이 없어 .br 파일은 만들지 않습니다. (pip install brotli)")
+        remove_compressed(filename, (".br",))
+    else:
+        with open(filename + ".br", "wb") as f:
+            f.write(brotli.compress(data, quality=11))
+        sizes['br'] = os.path.getsize(filename + ".br")
+    return sizes
+
+def optimize_output(filename):
+    # 저장된 HTML의 인라인 스타일 중복을 줄이고 공백을 줄인 뒤, 압축본을 만들어 크기를 보고
+    with open(filename, encoding="utf-8") as f:
+        html = f.read()
+    before = len(html.encode("utf-8"))
+    data = minify_html(dedupe_inline_styles(html)).encode("utf-8")
+    with open(filename, "wb") as f:
+        f.write(data)
+    sizes = write_compressed(filename, data)
+    report = f"HTML 최적화: {before / 1024:.0f}KB → {len(data) / 1024:.0f}KB ({len(data) / before:.0%})"
+    for ext, size in sizes.items():
+        report += f", .{ext} {size / 1024:.0f}KB (원본의 {size / before:.1%})"
+    print(report)
+    return sizes
+
+def write_streamed(m, filename):
+    # 마커를 뺀 페이지를 먼저 렌더링하고, 자리표시마다 등록된 스트림이 마커 데이터를 나눠 씀
+    html = m.get_root().render()
+    pieces = STREAM_TOKEN_RE.split(html)
+    with open(filename, "w", encoding="utf-8", newline="") as f:
+        f.write(pieces[0])
+        for k in range(1, len(pieces), 2):
+            m.pacs_streams[int(pieces[k])](f.write)
+            f.write(pieces[k + 1])
+
+def save_map(m, filename, optimize=False):
+    if getattr(m, 'pacs_streams', None):
+        write_streamed(m, filename)
+    else:
+        m.save(filename)
+    if optimize:
+        optimize_output(filename)
+    else:
+        remove_compressed(filename)
+    profile_count("html_bytes", os.path.getsize(filename))
+    print("\nHTML 파일 저장 완료:", filename)
+
+def git_blob_sha(data):
+    # git이 파일 내용으로 계산하는 blob SHA (원격 트리의 sha와 비교용)
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def publish_files(repo, files, message="자동 업로드", branch=None, tree_element=None):
+    # files: {원격 경로: 로컬 경로}
+    # 원격 트리와 blob SHA를 비교해 바뀐 파일만 올리고, 전체를 커밋 하나로 반영
+    # repo는 PyGithub Repository와 같은 메서드를 가진 객체면 됨 (테스트용 가짜 API 사용 가능)
+    if tree_element is None:
+        from github import InputGitTreeElement as tree_element
+    branch = branch or repo.default_branch
+    ref = repo.get_git_ref(f"heads/{branch}")
+    base_commit = repo.get_git_commit(ref.object.sha)
+    base_tree = repo.get_git_tree(base_commit.tree.sha, recursive=True)
+    remote = {e.path: e.sha for e in base_tree.tree if e.type == "blob"}
+    elements = []
+    for remote_path, local_path in sorted(files.items()):
+        with open(local_path, "rb") as f:
+            data = f.read()
+        if remote.get(remote_path) == git_blob_sha(data):
+            continue
+        blob = repo.create_git_blob(base64.b64encode(data).decode(), "base64")
+        profile_count("files_uploaded")
+        profile_count("bytes_uploaded", len(data))
+        elements.append(tree_element(remote_path, "100644", "blob", sha=blob.sha))
+        print(f"업로드: {local_path} -> {remote_path}")
+    print(f"파일 {len(files)}개 중 {len(elements)}개가 바뀌었습니다.")
+    if not elements:
+        return None
+    tree = repo.create_git_tree(elements, base_tree)
+    commit = repo.create_git_commit(message, tree, [base_commit])
+    ref.edit(commit.sha)
+    return commit
+
+def tiles_dir_for(filename):
+    # 타일 출력 모드의 데이터 폴더 (PACS.html → PACS_data)
+    return os.path.splitext(filename)[0] + "_data"
+
+def remote_path(path, base="."):
+    # 로컬 경로 → 저장소 안 경로 (base 폴더 기준, "/" 구분)
+    # 모든 파일을 같은 기준으로 바꿔야 HTML 안의 상대 경로(thumbs/, PACS_data/)가 서버에서도 맞음
+    rel = os.path.relpath(os.path.abspath(path), os.path.abspath(base))
+    if rel == ".." or rel.startswith(".." + os.sep) or os.path.isabs(rel):
+        raise SystemExit(f"{path}은(는) 저장소 폴더({os.path.abspath(base)}) 밖에 있어 업로드할 수 없습니다.")
+    return rel.replace(os.sep, "/")
+
+def publish_list(filename, excel_name, outputs=None, base="."):
+    # 올릴 파일 목록 {원격 경로: 로컬 경로}: 마지막 build가 기록한 출력(HTML, 썸네일, 타일 데이터)과 엑셀
+    # 폴더를 훑지 않으므로 예전 빌드가 남긴 썸네일이나 PACS_data/ 파일은 올리지 않음
+    if outputs is None:
+        outputs = load_build_cache(filename).get('outputs')
+    if outputs is None:
+        print(f"{filename}의 빌드 기록이 없어 HTML만 업로드합니다. (build를 먼저 실행하세요)")
+        outputs = [filename]
+    local = [path for path in outputs if os.path.exists(path)]
+    if len(local) < len(outputs):
+        print(f"빌드 뒤 지워진 파일 {len(outputs) - len(local)}개는 업로드하지 않았습니다. (build를 다시 실행하세요)")
+    if os.path.exists(excel_name):
+        local.append(excel_name)
+    else:
+        print(f"{excel_name} 파일이 존재하지 않아 업로드하지 않았습니다.")
+    return {remote_path(path, base): path for path in local}
+
+def connect_repo():
+    from dotenv import load_dotenv
+    from github import Github
+    load_dotenv()
+    GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+    g = Github(GITHUB_TOKEN, base_url=os.getenv('GITHUB_API_URL') or "https://api.github.com")
+    return g.get_repo(REPO_NAME)
+
+def publish(filename=FILENAME, excel_name='관리목록.xlsx', message="자동 업로드"):
+    SHARE_URL = f'come6433.github.io/q8r2x7v1p0/{remote_path(filename)}'
+    print("\nHTML 파일 업로드 시작")
+    files = publish_list(filename, excel_name)
+    with profile_stage("publish"):
+        commit = publish_files(connect_repo(), files, message)
+    if commit is None:
+        print("\n서버와 내용이 같아 업로드할 파일이 없습니다.")
+    else:
+        print("\n서버 업로드 완료!")
+    print(f"공유주소: {SHARE_URL}")
+    print(f"※※※ 페이지가 정상적으로 표시되려면 1~2분 정도 기다려야 합니다. ※※※")
+    return commit
+
+def github_upload(filename):
+    answer = input("\n업로드 하시겠습니까? (y/n): ").strip().lower()
+    if answer == "y":
+        publish(filename)
+    else:
+        print("\n업로드를 취소했습니다.")
+
+def write_map(df, images, filename, cache, popup_mode=POPUP_MODE, engine=RENDER_ENGINE, workers=WORKERS, tiles=False,
+              tile_proxy=None, optimize=False):
+    report_colocated(df)
+    m = make_map(df, images, popup_mode, engine, cache['fragments'], workers, tiles_dir_for(filename) if tiles else None, tile_proxy,
+                 STREAM_OUTPUT)
+    with profile_stage("add_legend_and_controls"):
+        add_legend_and_controls(m, df)
+        add_custom_js_css(m)
+    with profile_stage("save_map"):
+        save_map(m, filename, optimize)
+
+def build_outputs(filename, images, tiles=False):
+    # 페이지가 쓰는 파일 목록 (HTML, 썸네일, 타일 데이터)
+    base = os.path.dirname(filename)
+    outputs = [filename]
+    outputs += sorted({os.path.join(base, ref) for refs in images.values() for ref in refs})
+    if tiles:
+        tile_dir = os.path.join(tiles_dir_for(filename), "tiles")
+        outputs.append(os.path.join(tiles_dir_for(filename), "summary.json"))
+        outputs += [os.path.join(tile_dir, name) for name in sorted(os.listdir(tile_dir))]
+    return outputs
+
+def outputs_exist(cache, filename):
+    # 지난 빌드의 출력이 하나라도 지워졌으면(thumbs/, PACS_data/ 포함) 입력이 같아도 다시 빌드
+    return all(os.path.exists(path) for path in cache.get('outputs', [filename]))
+
+def build(excel_name='관리목록.xlsx', filename=FILENAME, popup_mode=POPUP_MODE, engine=RENDER_ENGINE, workers=WORKERS, force=False, tiles=False,
+          tile_proxy=None, optimize=False, images_dir=IMAGES_DIR):
+    # 엑셀 → 지도 HTML, 입력이 바뀌지 않았으면 False (HTML을 다시 쓰지 않음)
+    # tiles=True면 마커 데이터를 PACS_data/ 타일 파일로 나눠 화면에 보이는 부분만 불러오게 함
+    cache = load_build_cache(filename)
+    fingerprint = input_fingerprint(excel_name, images_dir, [popup_mode, engine, filename, tiles, tile_proxy, optimize])
+    if not force and cache['fingerprint'] == fingerprint and outputs_exist(cache, filename):
+        print(f"{excel_name}와 사진이 바뀌지 않아 {filename}을 다시 만들지 않습니다.")
+        return False
+    with profile_stage("read_excel"):
+        df = read_excel(excel_name)
+    with profile_stage("build_image_cache"):
+        images = build_image_cache(df, images_dir, os.path.join(os.path.dirname(filename), THUMBS_DIR), workers)
+    write_map(df, images, filename, cache, popup_mode, engine, workers, tiles, tile_proxy, optimize)
+    cache['fingerprint'] = fingerprint
+    cache['outputs'] = build_outputs(filename, images, tiles)
+    save_build_cache(cache, filename)
+    return True
+
+BUILD_OPTIONS = ['popup_mode', 'engine', 'tiles', 'tile_proxy', 'optimize', 'images_dir']
+
+def load_manifest(path):
+    # batch 목록 JSON:
+    # {"images_dir": "images", "overview": "전체.html",
+    #  "maps": [{"excel": "중구.xlsx", "output": "중구.html", "name": "중구"}, ...]}
+    # 최상위에 쓴 BUILD_OPTIONS는 모든 지도의 기본값, maps 항목마다 다시 지정할 수 있음
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    defaults = {key: manifest[key] for key in BUILD_OPTIONS if key in manifest}
+    entries = []
+    for item in manifest['maps']:
+        entry = dict(defaults, **item)
+        for key in ('excel', 'output', 'images_dir'):
+            if key in entry:
+                entry[key] = os.path.join(base, entry[key])
+        entry.setdefault('images_dir', os.path.join(base, IMAGES_DIR))
+        entry.setdefault('name', os.path.splitext(os.path.basename(entry['excel']))[0])
+        entries.append(entry)
+    overview = manifest.get('overview')
+    if overview:
+        overview = dict(defaults, output=os.path.join(base, overview))
+    return entries, overview
+
+def build_entry(entry, force=False):
+    # batch 작업자 프로세스에서 지도 하나 생성 - 출력은 모아서 돌려줌 (여러 지도의 메시지가 섞이지 않게)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        changed = build(
+            entry['excel'], entry['output'], entry.get('popup_mode', POPUP_MODE), entry.get('engine', RENDER_ENGINE),
+            1, force, entry.get('tiles', False), entry.get('tile_proxy'), entry.get('optimize', False), entry['images_dir'],
+        )
+    return changed, log.getvalue()
+
+def build_overview(entries, overview, force=False, workers=WORKERS):
+    # 모든 구역 엑셀을 합친 전체 지도 - 엑셀 파싱 결과(.pacs_cache 스냅샷)와 썸네일, 마커 조각 캐시를 그대로 재사용
+    import pandas as pd
+    filename = overview['output']
+    options = [overview.get(key) for key in BUILD_OPTIONS]
+    h = hashlib.sha256(json.dumps([filename, options], ensure_ascii=False).encode())
+    for entry in entries:
+        h.update(input_fingerprint(entry['excel'], entry['images_dir'], [entry['name']]).encode())
+    fingerprint = h.hexdigest()
+    cache = load_build_cache(filename)
+    if not force and cache['fingerprint'] == fingerprint and outputs_exist(cache, filename):
+        print(f"구역 엑셀이 바뀌지 않아 {filename}을 다시 만들지 않습니다.")
+        return False
+    frames = []
+    images = {}
+    for entry in entries:
+        df = read_excel(entry['excel'])
+        # 구역마다 관리번호가 겹치므로 사진은 (구역, 관리번호)로 구분
+        district_images = build_image_cache(df, entry['images_dir'], os.path.join(os.path.dirname(filename), THUMBS_DIR), workers)
+        images.update(((entry['name'], 관리번호), refs) for 관리번호, refs in district_images.items())
+        frames.append(df.assign(**{DISTRICT_COLUMN: entry['name']}))
+    df = pd.concat(frames, ignore_index=True)
+    df.attrs['districts'] = True
+    write_map(df, images, filename, cache, overview.get('popup_mode', POPUP_MODE), overview.get('engine', RENDER_ENGINE),
+              workers, overview.get('tiles', False), overview.get('tile_proxy'), overview.get('optimize', False))
+    cache['fingerprint'] = fingerprint
+    cache['outputs'] = build_outputs(filename, images, overview.get('tiles', False))
+    save_build_cache(cache, filename)
+    return True
+
+def build_batch(manifest_path, jobs=BATCH_JOBS, force=False):
+    # 목록의 지도를 jobs개 프로세스로 동시에 만들고, overview가 있으면 전체 지도도 만듦
+    # 바뀌지 않은 구역은 지문 비교만 하고 넘어가므로 전체 시간은 바뀐 데이터 양에 비례
+    entries, overview = load_manifest(manifest_path)
+    failed = []
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(build_entry, entry, force): entry for entry in entries}
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                changed, log = future.result()
+            except Exception as e:
+                failed.append(entry['name'])
+                print(f"[{entry['name']}] 생성 실패: {e}")
+                continue
+            print(f"[{entry['name']}] {'생성 완료' if changed else '변경 없음'}: {entry['output']}")
+            if changed:
+                print(log.rstrip())
+    if overview and not failed:
+        build_overview(entries, overview, force, max(1, jobs))
+    print(f"\n지도 {len(entries)}개 처리 ({time.perf_counter() - started:.1f}초), 실패 {len(failed)}개")
+    return not failed
+
+def print_stats(excel_name='관리목록.xlsx', images_dir=IMAGES_DIR):
+    df = read_excel(excel_name)
+    groups = marker_groups(df)
+    layer_counts = [0] * len(LAYER_NAMES)
+    단수 = df['단수'].tolist()
+    for marker_no, rows in groups.items():
+        layer_counts[marker_style(marker_no, {'단수': 단수[rows[0]]})['layer']] += 1
+    ids = df['관리번호'].map(str).unique()
+    with_photo = sum(os.path.exists(f"{images_dir}/{관리번호}.jpg") for 관리번호 in ids)
+    print("=" * 40)
+    print(f"게시대(행):  {len(df)}")
+    print(f"마커:        {len(groups)}")
+    for name, count, legend in zip(LAYER_NAMES, layer_counts, legend_counts(df)):
+        print(f"  {name}: 마커 {count}개, 범례 {legend}개")
+    print(f"사진:        {with_photo}개 있음, {len(ids) - with_photo}개 없음")
+    print(f"좌표 중복:   {len(find_colocated_groups(df))}곳 (마커번호가 다른데 {COLOCATED_TOLERANCE_M:g}m 이내)")
+    print(f"위도 범위:   {df['위도'].min():.6f} ~ {df['위도'].max():.6f}")
+    print(f"경도 범위:   {df['경도'].min():.6f} ~ {df['경도'].max():.6f}")
+    print("=" * 40)
+
+LIVE_RELOAD_JS = r"""<script>
+(function() {
+    // watch 미리보기 서버가 HTML을 보낼 때만 붙이는 코드 (저장되는 PACS.html에는 없음)
+    var KEY = "pacsLiveView";
+    function findMap() {
+        for (var key in window) {
+            if (key.startsWith("map_") && window[key] instanceof L.Map) return window[key];
+        }
+        return null;
+    }
+    window.addEventListener('load', function() {
+        var map = findMap(), view = sessionStorage.getItem(KEY);
+        if (map && view) {
+            view = JSON.parse(view);
+            map.setView([view.lat, view.lng], view.zoom, {animate: false});
+        }
+        sessionStorage.removeItem(KEY);
+        new EventSource("/__pacs_events").onmessage = function(e) {
+            if (e.data !== "reload") return;
+            if (map) {
+                var c = map.getCenter();
+                sessionStorage.setItem(KEY, JSON.stringify({lat: c.lat, lng: c.lng, zoom: map.getZoom()}));
+            }
+            location.reload();
+        };
+    });
+})();
+</script>
+"""
+
+def watch_snapshot(paths):
+    # {경로: (크기, 수정시각)} - 폴더는 바로 아래 파일까지 포함
+    snapshot = {}
+    for path in paths:
+        if os.path.isdir(path):
+            for entry in os.scandir(path):
+                if entry.is_file():
+                    st = entry.stat()
+                    snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+        elif os.path.exists(path):
+            st = os.stat(path)
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+def start_preview_server(directory, port):
+    # 출력 폴더를 서빙하는 로컬 서버, HTML에는 LIVE_RELOAD_JS를 붙이고 /__pacs_events 로 새로고침 신호(SSE)를 보냄
+    import http.server
+    state = {'version': 0}
+    changed = threading.Condition()
+
+    class Handler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=directory, **kwargs)
+
+        def log_message(self, format, *args):
+            pass
+
+        def end_headers(self):
+            self.send_header("Cache-Control", "no-store")
+            super().end_headers()
+
+        def do_GET(self):
+            if self.path == "/__pacs_events":
+                return self.send_events()
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "index.html")
+            if not path.endswith(".html") or not os.path.isfile(path):
+                return super().do_GET()
+            with open(path, "rb") as f:
+                body = f.read()
+            end = body.rfind(b"</body>")
+            if end < 0:
+                end = len(body)
+            body = body[:end] + LIVE_RELOAD_JS.encode("utf-8") + body[end:]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_events(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            seen = state['version']
+            try:
+                while True:
+                    with changed:
+                        changed.wait_for(lambda: state['version'] != seen, timeout=15)
+                        version = state['version']
+                    if version != seen:
+                        seen = version
+                        self.wfile.write(b"data: reload\n\n")
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except OSError:
+                pass  # 브라우저 탭이 닫힘
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def notify():
+        with changed:
+            state['version'] += 1
+            changed.notify_all()
+
+    return server, notify
+
+def watch(excel_name='관리목록.xlsx', filename=FILENAME, popup_mode=POPUP_MODE, engine=RENDER_ENGINE, workers=WORKERS,
+          tiles=False, port=8000, serve=True, interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, images_dir=IMAGES_DIR):
+    # 엑셀과 사진 폴더를 지켜보다가 바뀌면 다시 생성하고, 열려 있는 브라우저를 새로고침
+    # 다시 생성할 때는 build 캐시로 바뀐 마커 그룹만 새로 만들고, 사진만 바뀌면 엑셀은 다시 읽지 않음
+    notify = None
+    server = None
+    if serve:
+        server, notify = start_preview_server(os.path.dirname(os.path.abspath(filename)), port)
+        print(f"미리보기: http://127.0.0.1:{port}/{os.path.basename(filename)}")
+    print(f"{excel_name}와 {images_dir}/ 폴더를 지켜보는 중입니다. (Ctrl+C로 종료)")
+    paths = [excel_name, images_dir]
+    built = None
+    pending = watch_snapshot(paths)
+    pending_since = 0.0
+    try:
+        while True:
+            if pending != built and time.monotonic() - pending_since >= debounce:
+                started = time.perf_counter()
+                try:
+                    changed = build(excel_name, filename, popup_mode, engine, workers, False, tiles, images_dir=images_dir)
+                except Exception as e:
+                    # 엑셀이 저장 중이라 잠겨 있거나 깨진 경우 - 다음 변경 때 다시 시도
+                    print(f"생성 실패: {e}")
+                    changed = False
+                built = pending
+                if changed:
+                    print(f"다시 생성 완료 ({time.perf_counter() - started:.1f}초)")
+                    if notify:
+                        notify()
+            time.sleep(interval)
+            snapshot = watch_snapshot(paths)
+            if snapshot != pending:
+                pending = snapshot
+                pending_since = time.monotonic()
+    except KeyboardInterrupt:
+        print("\n지켜보기를 종료합니다.")
+    finally:
+        if server:
+            server.shutdown()
+
+class TileCache:
+    # 배경지도 타일 디스크 캐시: 레이어별 용량 제한(LRU)과 유효기간(TTL)
+    # 같은 타일을 여러 스레드가 동시에 요청하면 원본에는 한 번만 요청함
+    def __init__(self, root=os.path.join(CACHE_DIR, "tiles"), layers=TILE_LAYERS, upstreams=None, session=None):
+        self.root = root
+        self.layers = {layer['key']: dict(layer) for layer in layers}
+        for key, url in (upstreams or {}).items():
+            self.layers[key]['url'] = url
+        self.session = session
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.lru = {}
+        self.used = {}
+        for key in self.layers:
+            # 마지막 사용 시각은 파일 atime으로 남겨 다시 시작해도 LRU 순서를 유지
+            entries = []
+            layer_dir = os.path.join(root, key)
+            for dirpath, dirnames, names in os.walk(layer_dir):
+                for name in names:
+                    path = os.path.join(dirpath, name)
+                    st = os.stat(path)
+                    entries.append((st.st_atime, path, st.st_size))
+            self.lru[key] = {path: size for _, path, size in sorted(entries)}
+            self.used[key] = sum(self.lru[key].values())
+
+    def path(self, key, z, x, y):
+        return os.path.join(self.root, key, str(z), str(x), f"{y}.tile")
+
+    def get(self, key, z, x, y):
+        # 타일 바이트 반환, 원본 실패 시 기간이 지난 캐시라도 있으면 그것을 씀 (없으면 None)
+        layer = self.layers[key]
+        path = self.path(key, z, x, y)
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st and time.time() - st.st_mtime < layer['ttl']:
+            data = self.read(key, path, st)
+            if data is not None:
+                return data
+            st = None  # stat과 읽기 사이에 다른 요청이 용량 제한으로 지움 - 원본에서 다시 받음
+        with self.lock:
+            pending = self.inflight.get(path)
+            owner = pending is None
+            if owner:
+                pending = self.inflight[path] = {'done': threading.Event(), 'data': None}
+        if not owner:
+            pending['done'].wait()
+            return pending['data']
+        try:
+            data = self.fetch(layer['url'].format(z=z, x=x, y=y))
+            if data is not None:
+                self.store(key, path, data)
+            elif st:
+                data = self.read(key, path, st)
+            pending['data'] = data
+            return data
+        finally:
+            with self.lock:
+                del self.inflight[path]
+            pending['done'].set()
+
+    def fetch(self, url):
+        if self.session is None:
+            import requests
+            self.session = requests.Session()
+        try:
+            r = self.session.get(url, timeout=10)
+        except Exception:
+            return None
+        return r.content if r.status_code == 200 and r.content else None
+
+    def read(self, key, path, st):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path, ns=(time.time_ns(), st.st_mtime_ns))
+        except OSError:
+            pass
+        with self.lock:
+            lru = self.lru[key]
+            if path in lru:
+                lru[path] = lru.pop(path)
+            elif os.path.exists(path):
+                # 목록에 없던 타일(실행 중에 다른 프로세스가 씀)은 크기를 더해 추적 - 읽은 뒤 지워진 타일은 다시 넣지 않음
+                lru[path] = len(data)
+                self.used[key] += len(data)
+                self.evict(key)
+        return data
+
+    def store(self, key, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self.lock:
+            lru = self.lru[key]
+            self.used[key] += len(data) - lru.pop(path, 0)
+            lru[path] = len(data)
+            self.evict(key)
+
+    def evict(self, key):
+        # self.lock을 잡은 상태에서 호출 - 용량을 넘으면 가장 오래 안 쓴 타일부터 지움 (방금 쓴 타일은 남김)
+        limit = self.layers[key]['cache_mb'] * 2 ** 20
+        lru = self.lru[key]
+        while self.used[key] > limit and len(lru) > 1:
+            old = next(iter(lru))
+            self.used[key] -= lru.pop(old)
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+def tile_content_type(data):
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    return "application/octet-stream"
+
+def serve_tile_proxy(cache, port=TILE_PROXY_PORT, host="127.0.0.1"):
+    # /tiles/<레이어 키>/<z>/<x>/<y> 요청을 캐시에서 주고, 없으면 원본에서 받아 저장
+    import http.server
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            parts = self.path.split("?")[0].strip("/").split("/")
+            if len(parts) != 5 or parts[0] != "tiles" or parts[1] not in cache.layers \
+                    or not all(p.isdigit() for p in parts[2:]):
+                self.send_error(404)
+                return
+            data = cache.get(parts[1], *map(int, parts[2:]))
+            if data is None:
+                self.send_error(502)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", tile_content_type(data))
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Cache-Control", f"max-age={min(cache.layers[parts[1]]['ttl'], 86400)}")
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+def tile_range(south, west, north, east, z):
+    # 위경도 범위를 덮는 웹 메르카토르 타일 번호 범위 (x0, x1, y0, y1)
+    def tile_xy(lat, lon):
+        n = 2 ** z
+        x = int((lon + 180) / 360 * n)
+        y = int((1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n)
+        return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+    x0, y0 = tile_xy(north, west)
+    x1, y1 = tile_xy(south, east)
+    return x0, x1, y0, y1
+
+def prefetch_tiles(cache, bounds, zooms=PREFETCH_ZOOMS, keys=None, threads=8, max_tiles=PREFETCH_MAX_TILES):
+    # bounds(남, 서, 북, 동)를 덮는 zooms 범위의 타일을 미리 받아 캐시를 채움
+    from concurrent.futures import ThreadPoolExecutor
+    keys = keys or [layer['key'] for layer in TILE_LAYERS if not layer['overlay']]
+    jobs = []
+    for key in keys:
+        options = cache.layers[key].get('options', {})
+        for z in range(max(zooms[0], options.get('min_zoom', 0)), min(zooms[1], options.get('max_zoom', 21)) + 1):
+            x0, x1, y0, y1 = tile_range(*bounds, z)
+            jobs.extend((key, z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1))
+    print(f"타일 {len(jobs)}개 ({', '.join(keys)}, 줌 {zooms[0]}~{zooms[1]})")
+    if len(jobs) > max_tiles:
+        print(f"타일이 너무 많습니다. 줌 범위를 줄이거나 --max-tiles {len(jobs)} 로 실행하세요.")
+        return 0, len(jobs)
+    failed = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for n, data in enumerate(pool.map(lambda job: cache.get(*job), jobs), 1):
+            failed += data is None
+            if n % 1000 == 0:
+                print(f"  {n}/{len(jobs)}")
+    print(f"받은 타일 {len(jobs) - failed}개, 실패 {failed}개")
+    return len(jobs) - failed, failed
+
+def data_bounds(df, pad=0.005):
+    return (df['위도'].min() - pad, df['경도'].min() - pad, df['위도'].max() + pad, df['경도'].max() + pad)
+
+def parse_upstreams(items):
+    # ["키=URL 템플릿", ...] → {키: URL} (로컬 테스트 서버로 원본을 바꿀 때 사용)
+    upstreams = {}
+    for item in items or []:
+        key, _, url = item.partition("=")
+        if key not in {layer['key'] for layer in TILE_LAYERS} or not url:
+            raise SystemExit(f"잘못된 --upstream 값: {item}")
+        upstreams[key] = url
+    return upstreams
+
+def main():
+    update = start_update_check()
+    print_intro()
+    build()
+    apply_pending_update(update)
+    github_upload(FILENAME)
+    print("=" * 40)
+    input("아무 키나 누르면 종료합니다.")
+
+def cli(argv=None):
+    # 인자 없이 실행하면 기존처럼 대화형(main), 하위 명령은 묻지 않고 실행 (작업 스케줄러용)
+    parser = argparse.ArgumentParser(prog="PACSmaker", description="PACS 저상게시대 지도 생성기")
+    parser.add_argument("--version", action="version", version=CURRENT_VERSION)
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("build", help="지도 HTML 생성")
+    p.add_argument("--excel", default='관리목록.xlsx')
+    p.add_argument("--output", default=FILENAME)
+    p.add_argument("--popup-mode", choices=["lazy", "html"], default=POPUP_MODE)
+    p.add_argument("--engine", choices=["dom", "canvas", "cluster"], default=RENDER_ENGINE)
+    p.add_argument("--workers", type=int, default=WORKERS)
+    p.add_argument("--force", action="store_true", help="입력이 바뀌지 않았어도 다시 생성")
+    p.add_argument("--tiles", action="store_true", help="마커 데이터를 지역별 타일 파일로 나눠 저장")
+    p.add_argument("--images-dir", default=IMAGES_DIR)
+    p.add_argument("--tile-proxy", metavar="URL", help=f"배경지도를 로컬 타일 프록시로 받음 (예: http://127.0.0.1:{TILE_PROXY_PORT})")
+    p.add_argument("--optimize", action="store_true", help="스타일 중복 제거, 공백 축소, .gz/.br 압축본 생성")
+    p.add_argument("--profile", nargs="?", const="pacs_profile.json", metavar="REPORT",
+                   help="단계별 시간/메모리와 카운터를 JSON 보고서로 저장")
+    p.add_argument("--profile-dump", metavar="PATH", help="cProfile(pstats) 덤프도 저장 (--profile 필요 없음)")
+    p.add_argument("--profile-memory", action="store_true",
+                   help="단계별 할당량을 tracemalloc으로 잼 (--profile과 함께, 시간은 몇 배 느려짐)")
+    p = sub.add_parser("watch", help="엑셀/사진이 바뀌면 다시 생성하고 미리보기 브라우저를 새로고침")
+    p.add_argument("--excel", default='관리목록.xlsx')
+    p.add_argument("--output", default=FILENAME)
+    p.add_argument("--popup-mode", choices=["lazy", "html"], default=POPUP_MODE)
+    p.add_argument("--engine", choices=["dom", "canvas", "cluster"], default=RENDER_ENGINE)
+    p.add_argument("--workers", type=int, default=WORKERS)
+    p.add_argument("--tiles", action="store_true", help="마커 데이터를 지역별 타일 파일로 나눠 저장")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--no-serve", action="store_true", help="미리보기 서버 없이 다시 생성만 함")
+    p.add_argument("--images-dir", default=IMAGES_DIR)
+    p = sub.add_parser("batch", help="목록(JSON)의 여러 엑셀로 지도를 동시에 생성")
+    p.add_argument("manifest")
+    p.add_argument("--jobs", type=int, default=BATCH_JOBS, help="동시에 만들 지도 수")
+    p.add_argument("--force", action="store_true", help="입력이 바뀌지 않았어도 다시 생성")
+    layer_keys = [layer['key'] for layer in TILE_LAYERS]
+    p = sub.add_parser("tile-proxy", help="배경지도 타일 캐시 프록시 실행")
+    p.add_argument("--port", type=int, default=TILE_PROXY_PORT)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--upstream", action="append", metavar="KEY=URL", help=f"원본 타일 주소 바꾸기 ({', '.join(layer_keys)})")
+    p = sub.add_parser("prefetch", help="관리목록 범위의 배경지도 타일을 미리 받아 캐시")
+    p.add_argument("--excel", default='관리목록.xlsx')
+    p.add_argument("--zoom", type=int, nargs=2, default=list(PREFETCH_ZOOMS), metavar=("MIN", "MAX"))
+    p.add_argument("--layers", nargs="+", choices=layer_keys, help="기본: 배경지도 전체 (교통정보 제외)")
+    p.add_argument("--threads", type=int, default=8)
+    p.add_argument("--max-tiles", type=int, default=PREFETCH_MAX_TILES)
+    p.add_argument("--upstream", action="append", metavar="KEY=URL")
+    p = sub.add_parser("publish", help="바뀐 파일만 GitHub에 커밋 하나로 업로드")
+    p.add_argument("--excel", default='관리목록.xlsx')
+    p.add_argument("--output", default=FILENAME)
+    p.add_argument("--message", default="자동 업로드")
+    p.add_argument("--profile", nargs="?", const="pacs_profile.json", metavar="REPORT")
+    p.add_argument("--profile-dump", metavar="PATH")
+    p.add_argument("--profile-memory", action="store_true")
+    p = sub.add_parser("check-update", help="새 버전 확인")
+    p.add_argument("--apply", action="store_true", help="새 버전이 있으면 스크립트 교체")
+    p = sub.add_parser("stats", help="관리목록 통계 출력")
+    p.add_argument("--excel", default='관리목록.xlsx')
+    p.add_argument("--images-dir", default=IMAGES_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command in ("build", "publish") and (args.profile or args.profile_dump or args.profile_memory):
+        run = lambda func, *a: run_profiled(lambda: func(*a), args.profile or "pacs_profile.json", args.profile_dump,
+                                            args.profile_memory)
+    else:
+        run = lambda func, *a: func(*a)
+    if args.command is None:
+        main()
+    elif args.command == "build":
+        run(build, args.excel, args.output, args.popup_mode, args.engine, args.workers, args.force, args.tiles,
+            args.tile_proxy, args.optimize, args.images_dir)
+    elif args.command == "tile-proxy":
+        server = serve_tile_proxy(TileCache(upstreams=parse_upstreams(args.upstream)), args.port, args.host)
+        print(f"타일 프록시: http://{args.host}:{args.port}/tiles/<레이어>/{{z}}/{{x}}/{{y}} (Ctrl+C로 종료)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "prefetch":
+        bounds = data_bounds(read_excel(args.excel))
+        cache = TileCache(upstreams=parse_upstreams(args.upstream))
+        prefetch_tiles(cache, bounds, tuple(args.zoom), args.layers, args.threads, args.max_tiles)
+    elif args.command == "watch":
+        watch(args.excel, args.output, args.popup_mode, args.engine, args.workers, args.tiles, args.port, not args.no_serve,
+              images_dir=args.images_dir)
+    elif args.command == "batch":
+        if not build_batch(args.manifest, args.jobs, args.force):
+            sys.exit(1)
+    elif args.command == "publish":
+        run(publish, args.output, args.excel, args.message)
+    elif args.command == "check-update":
+        result = check_for_update()
+        for message in result['messages']:
+            print(message)
+        if result.get('version'):
+            if args.apply:
+                install_update(result)
+            else:
+                print(f"새 버전({result['version']})이 있습니다. --apply 로 업데이트할 수 있습니다.")
+    elif args.command == "stats":
+        print_stats(args.excel, args.images_dir)
+
+if __name__ == "__main__":
+    cli()
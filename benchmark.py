@@ -0,0 +1,579 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import PACSmaker
+
+RENDER_COUNTS = [1000, 5000, 20000]
+RENDER_ENGINES = ["dom", "canvas", "cluster"]
+
+RENDER_PAGE = r"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>PACS 렌더링 벤치마크</title>
+<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css">
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.css">
+<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/MarkerCluster.Default.css">
+<script src="https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js"></script>
+<script src="https://cdnjs.cloudflare.com/ajax/libs/leaflet.markercluster/1.1.0/leaflet.markercluster.js"></script>
+<style>
+html, body {margin: 0; height: 100%;}
+#mapBox {position: absolute; top: 0; bottom: 0; left: 0; right: 420px;}
+#mapBox > div {width: 100%; height: 100%;}
+#result {position: absolute; top: 0; right: 0; width: 400px; padding: 10px; font-size: 13px;}
+</style>
+</head>
+<body>
+<div id="mapBox"></div>
+<pre id="result">측정 중 ...</pre>
+<script>
+var PACS_COLUMNS = [], PACS_LAYERS = [], PACS_DATA = [], PACS_ENGINE = "dom";
+__MARKER_JS__
+var COUNTS = __COUNTS__;
+var ENGINES = __ENGINES__;
+var COLORS = __COLORS__;
+var CLUSTER_ICONS = [__CLUSTER_ICONS__];
+var CENTER = [37.5665, 126.978];
+var FRAMES = 120;
+
+function synthData(n) {
+    // 고정 시드 난수로 매번 같은 배치를 만듦
+    var seed = 12345, data = [];
+    function rand() { seed = (seed * 1103515245 + 12345) % 2147483648; return seed / 2147483648; }
+    for (var i = 0; i < n; i++) {
+        var layer = i % 5, label = String(i + 1), size = label.length <= 2 ? 24 : label.length === 3 ? 28 : label.length === 4 ? 32 : 36;
+        var bg = COLORS[layer], fg = (bg === "yellow") ? "black" : "white";
+        data.push([CENTER[0] + (rand() - 0.5) * 0.2, CENTER[1] + (rand() - 0.5) * 0.25, label, bg, fg, size, 11, layer,
+                   "벤치마크 " + i, [String(i)], [0], []]);
+    }
+    return data;
+}
+
+function measure(engine, n, done) {
+    var box = document.getElementById('mapBox');
+    box.innerHTML = "<div></div>";
+    var map = L.map(box.firstChild).setView(CENTER, 14);
+    PACS_ENGINE = engine;
+    pacsCanvas = null;
+    var layers = COLORS.map(function(color, k) {
+        var layer = engine === "cluster"
+            ? L.markerClusterGroup({disableClusteringAtZoom: 17, iconCreateFunction: CLUSTER_ICONS[k]})
+            : L.featureGroup();
+        return layer.addTo(map);
+    });
+    var data = synthData(n);
+    var t0 = performance.now();
+    pacsAddMarkers(data, layers);
+    var setup = performance.now() - t0;
+    var frames = [], last = null, step = 0;
+    function frame(now) {
+        if (last !== null) frames.push(now - last);
+        last = now;
+        if (step++ >= FRAMES) {
+            map.remove();
+            frames.sort(function(a, b) { return a - b; });
+            var sum = frames.reduce(function(a, b) { return a + b; }, 0);
+            done({engine: engine, markers: n, setup_ms: setup, mean_ms: sum / frames.length,
+                  p95_ms: frames[Math.floor(frames.length * 0.95)], max_ms: frames[frames.length - 1]});
+            return;
+        }
+        // 좌우로 흔들며 이동해서 매 프레임 다시 그리게 함
+        map.panBy([(Math.floor(step / 30) % 2 ? -1 : 1) * 20, 10 * Math.sin(step / 8)], {animate: false});
+        requestAnimationFrame(frame);
+    }
+    requestAnimationFrame(frame);
+}
+
+function fmt(r) {
+    return r.engine + "\t" + r.markers + "\t" + r.setup_ms.toFixed(0) + "\t" + r.mean_ms.toFixed(1) + "\t" + r.p95_ms.toFixed(1) + "\t" + r.max_ms.toFixed(1);
+}
+
+window.benchResults = [];
+var cases = [];
+ENGINES.forEach(function(engine) { COUNTS.forEach(function(n) { cases.push([engine, n]); }); });
+function next() {
+    var out = document.getElementById('result');
+    out.textContent = "engine\tmarkers\tsetup\tmean\tp95\tmax (ms)\n" + window.benchResults.map(fmt).join("\n");
+    if (!cases.length) {
+        document.title = "done";
+        return;
+    }
+    var c = cases.shift();
+    measure(c[0], c[1], function(r) { window.benchResults.push(r); setTimeout(next, 200); });
+}
+window.addEventListener('load', function() { setTimeout(next, 500); });
+</script>
+</body>
+</html>
+"""
+
+def write_render_benchmark(path, counts=RENDER_COUNTS, engines=RENDER_ENGINES):
+    # 엔진별, 마커 수별 프레임 시간을 재는 페이지 (PACSmaker의 마커 렌더러를 그대로 사용)
+    icons = [
+        PACSmaker.CLUSTER_ICON_JS % (color, PACSmaker.get_marker_text_color(color))
+        for color in PACSmaker.LAYER_COLORS
+    ]
+    html = (
+        RENDER_PAGE
+        .replace("__MARKER_JS__", PACSmaker.MARKER_DATA_JS)
+        .replace("__COUNTS__", json.dumps(counts))
+        .replace("__ENGINES__", json.dumps(engines))
+        .replace("__COLORS__", json.dumps(PACSmaker.LAYER_COLORS))
+        .replace("__CLUSTER_ICONS__", ",\n".join(icons))
+    )
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+    print("렌더링 벤치마크 페이지 저장:", path)
+    print("브라우저로 열면 결과가 표에 표시되고 window.benchResults 에도 저장됩니다.")
+
+SYNTH_DEPARTMENTS = ['도로과', '건설과', '교통행정과', '공원녹지과', None]
+
+def synthetic_rows(rows, group_size=2, seed=0):
+    # 관리목록 형식의 가짜 행 - 마커번호 하나에 최대 group_size개 게시대, 일부는 설치/철거/변경예정
+    rnd = random.Random(seed)
+    columns = ['순번', '마커번호', '관리번호', '설치장소', '단수', '위도', '경도', '관리부서', '규격', '설치일', '비고']
+    data = []
+    marker = 0
+    while len(data) < rows:
+        marker += 1
+        size = rnd.randint(1, group_size)
+        kind = rnd.random()
+        if kind < 0.03:
+            marker_no = f"설치예정{marker}"
+        elif kind < 0.05:
+            marker_no = f"철거예정{marker}"
+        elif kind < 0.07:
+            marker_no = f"변경예정{marker}"
+        else:
+            marker_no = marker
+        lat = 37.45 + rnd.random() * 0.2
+        lon = 126.85 + rnd.random() * 0.3
+        for k in range(size):
+            data.append([
+                len(data) + 1, marker_no, f"{marker}-{k + 1}" if size > 1 else str(marker),
+                f"서울시 {rnd.choice(['중구', '종로구', '마포구', '강남구'])} {marker}번지 앞", size, lat, lon,
+                rnd.choice(SYNTH_DEPARTMENTS), f"{rnd.choice([600, 900, 1200])}x{rnd.choice([400, 600])}",
+                f"20{rnd.randint(10, 24)}-0{rnd.randint(1, 9)}-1{rnd.randint(0, 9)}",
+                "현수막 게시\n주 1회 점검" if rnd.random() < 0.2 else None,
+            ])
+    return columns, data[:rows]
+
+def synthetic_frame(rows, group_size=2, seed=0):
+    import pandas as pd
+    columns, data = synthetic_rows(rows, group_size, seed)
+    return pd.DataFrame(data, columns=columns)
+
+def bench_popup(rows=10000, repeat=3):
+    # 기존 make_popup_html(그룹마다 iterrows) 과 build_popup_html_all(칼럼 단위 + 템플릿) 비교
+    df = synthetic_frame(rows)
+    ids = df['관리번호'].map(str).tolist()
+    images = {i: (f"thumbs/{i}_t.jpg", f"thumbs/{i}_m.jpg") for i in ids[::2]}
+
+    def old():
+        return {marker_no: PACSmaker.make_popup_html(group, df, images) for marker_no, group in df.groupby('마커번호')}
+
+    def new():
+        return PACSmaker.build_popup_html_all(df, images)
+
+    results = {}
+    for name, func in (("make_popup_html", old), ("build_popup_html_all", new)):
+        best = None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            out = func()
+            elapsed = time.perf_counter() - t0
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = (best, out)
+        print(f"{name:22s} {best * 1000:9.1f} ms  ({len(out)} 그룹, {rows} 행)")
+    same = results["make_popup_html"][1] == results["build_popup_html_all"][1]
+    print("HTML 동일:", same)
+    print(f"속도 향상: {results['make_popup_html'][0] / results['build_popup_html_all'][0]:.1f}배")
+    # 일부 사진은 확대 이미지 없이(base64 원본처럼) 넣어 pacsPopupHtml의 분기도 확인
+    images.update({i: (f"data:image/jpeg;base64,{i}", None) for i in ids[1::4]})
+    js_same = check_popup_js(df, images)
+    return same and js_same is not False
+
+def check_popup_js(df, images=None):
+    # 같은 그룹에 대해 lazy 모드 팝업(브라우저의 pacsPopupHtml)과 html 모드 팝업(render_popup_html)이 같은지 node로 확인
+    # html 모드는 folium.Popup이 같은 크기의 div로 한 번 더 감싸므로 그 div를 붙여 비교 (node가 없으면 None)
+    if shutil.which("node") is None:
+        print("node가 없어 JS 팝업 비교는 건너뜁니다.")
+        return None
+    records = PACSmaker.render_marker_fragments(df, images, lazy=True)
+    fragments = PACSmaker.render_marker_fragments(df, images, lazy=False)
+    columns = [str(col) for col in PACSmaker.popup_columns(df)]
+    start = PACSmaker.MARKER_DATA_JS.index("function pacsPopupHtml")
+    end = PACSmaker.MARKER_DATA_JS.index("\n}\n", start) + 3
+    script = (
+        f"var PACS_COLUMNS = {PACSmaker.to_js_json(columns)};\n"
+        f"{PACSmaker.MARKER_DATA_JS[start:end]}"
+        "var data = JSON.parse(require('fs').readFileSync(0, 'utf8'));\n"
+        "process.stdout.write(JSON.stringify(data.map(pacsPopupHtml)));\n"
+    )
+    proc = subprocess.run(
+        ["node", "-e", script], input=PACSmaker.to_js_json(list(records.values())),
+        capture_output=True, text=True, encoding="utf-8", check=True,
+    )
+    mismatches = [
+        (marker_no, js, html)
+        for marker_no, js in zip(records, json.loads(proc.stdout))
+        for html in ["<div style='width: 100.0%; height: 100.0%;'>" + fragments[marker_no][4] + "</div>"]
+        if js != html
+    ]
+    print(f"JS 팝업 동일: {not mismatches} ({len(records) - len(mismatches)}/{len(records)} 그룹)")
+    if mismatches:
+        marker_no, js, html = mismatches[0]
+        k = next((n for n, (a, b) in enumerate(zip(js, html)) if a != b), min(len(js), len(html)))
+        print(f"  마커번호 {marker_no}: JS  ...{js[max(0, k - 40):k + 80]}")
+        print(f"  {' ' * len(str(marker_no))}        html ...{html[max(0, k - 40):k + 80]}")
+    return not mismatches
+
+def bench_parallel(rows=50000, workers=(1, 2, 4, 8), lazy=True):
+    # 마커 조각 생성을 프로세스 수별로 재고, 결과가 순차 처리와 바이트 단위로 같은지 확인
+    df = synthetic_frame(rows)
+    groups = PACSmaker.marker_groups(df)
+    marker_nos = list(groups)
+    baseline = None
+    serial_time = None
+    same = True
+    for n in workers:
+        t0 = time.perf_counter()
+        fragments = PACSmaker.render_marker_fragments_parallel(df, groups, marker_nos, {}, lazy, n)
+        elapsed = time.perf_counter() - t0
+        out = PACSmaker.to_js_json([fragments[marker_no] for marker_no in groups])
+        if baseline is None:
+            baseline, serial_time = out, elapsed
+        same = same and out == baseline
+        print(f"workers={n:2d} {elapsed * 1000:9.1f} ms  x{serial_time / elapsed:4.1f}  동일: {out == baseline}")
+    return same
+
+STARTUP_COMMANDS = ["build", "watch", "tile-proxy", "prefetch", "batch", "publish", "check-update", "stats"]
+HEAVY_MODULES = ["pandas", "numpy", "folium", "openpyxl", "requests", "github", "PIL"]
+STARTUP_FLOOR_MS = 100  # 이보다 작은 차이는 측정 잡음으로 보고 회귀로 치지 않음
+DEAD_URL = "http://127.0.0.1:9"  # 연결이 바로 거절되는 주소 - 네트워크 단계가 밖으로 나가지 않게 함
+
+# 하위 명령별 실제 인자와, 계속 실행되는 명령이면 준비됐다고 보는 출력 (이 줄이 나오면 종료시킴)
+STARTUP_RUNS = {
+    'build': (["build"], None),
+    'watch': (["watch", "--no-serve"], "다시 생성 완료"),
+    'tile-proxy': (["tile-proxy", "--port", "0"], "타일 프록시:"),
+    'prefetch': (["prefetch", "--zoom", "13", "13", "--layers", "vworld_base", "--threads", "1",
+                  "--upstream", f"vworld_base={DEAD_URL}/{{z}}/{{x}}/{{y}}"], None),
+    'batch': (["batch", "batch.json", "--jobs", "1"], None),
+    'publish': (["publish"], None),
+    'check-update': (["check-update"], None),
+    'stats': (["stats"], None),
+}
+
+def write_startup_fixture(path):
+    # 작은 관리목록과 사진, 방금 확인한 것으로 저장된 업데이트 상태(네트워크 확인 생략)를 만듦
+    os.makedirs(os.path.join(path, PACSmaker.CACHE_DIR), exist_ok=True)
+    write_synthetic_workbook(os.path.join(path, "관리목록.xlsx"), 20, photos=0.3, photo_size=(64, 48),
+                             images_dir=os.path.join(path, PACSmaker.IMAGES_DIR))
+    with open(os.path.join(path, PACSmaker.CACHE_DIR, "update.json"), "w", encoding="utf-8") as f:
+        json.dump({'checked_at': time.time() + 3600, 'remote_version': PACSmaker.CURRENT_VERSION}, f)
+    with open(os.path.join(path, "batch.json"), "w", encoding="utf-8") as f:
+        json.dump({'maps': [{'excel': "관리목록.xlsx", 'output': "batch.html"}]}, f)
+    with open(os.path.join(path, PACSmaker.FILENAME), "w", encoding="utf-8") as f:
+        f.write("<html></html>")
+
+def parse_importtime(stderr):
+    # -X importtime 출력에서 최상위 임포트 시간 합(us)과 불러온 최상위 패키지 이름
+    total_us = 0
+    loaded = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        name = parts[2].rstrip()
+        if not parts[1].strip().isdigit():
+            continue
+        if not name.startswith("  "):
+            total_us += int(parts[1])
+        loaded.add(name.strip().split(".")[0])
+    return total_us, loaded
+
+def run_startup_command(script, argv, ready, cwd, timeout=60):
+    # python -X importtime 으로 명령을 실제로 실행 - ready가 있으면 그 출력이 나올 때까지, 없으면 끝날 때까지 잼
+    env = dict(os.environ, PYTHONIOENCODING="utf-8", GITHUB_TOKEN="benchmark", GITHUB_API_URL=DEAD_URL)
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as err:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-u", "-X", "importtime", script] + argv, cwd=cwd, env=env,
+                                stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=err,
+                                text=True, encoding="utf-8", errors="replace")
+        timer = threading.Timer(timeout, proc.kill)
+        timer.start()
+        try:
+            if ready:
+                seen = any(ready in line for line in proc.stdout)
+                wall = time.perf_counter() - t0
+                proc.terminate()
+                proc.communicate()
+                code = 0 if seen else proc.returncode
+            else:
+                proc.communicate()
+                wall = time.perf_counter() - t0
+                code = proc.returncode
+        finally:
+            timer.cancel()
+        err.seek(0)
+        return wall, code, err.read()
+
+def bench_startup(commands=STARTUP_COMMANDS, out=None, baseline=None, save_baseline=False, threshold=0.2):
+    # 하위 명령을 작은 가짜 관리목록에 대해 실제로 실행하고 실행 시간, 임포트 시간, 불러온 무거운 모듈을 잼
+    # 네트워크를 쓰는 단계(publish, prefetch)는 바로 연결이 거절되는 주소로 보내 임포트까지만 확인함
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "PACSmaker.py")
+    root = tempfile.mkdtemp(prefix="pacs_startup_")
+    results = {}
+    try:
+        fixture = os.path.join(root, "fixture")
+        write_startup_fixture(fixture)
+        for command in commands:
+            argv, ready = STARTUP_RUNS[command]
+            # 명령마다 새 복사본에서 실행 - 앞 명령이 남긴 캐시가 결과에 섞이지 않게
+            cwd = shutil.copytree(fixture, os.path.join(root, command))
+            wall, code, stderr = run_startup_command(script, argv, ready, cwd)
+            total_us, loaded = parse_importtime(stderr)
+            heavy = [m for m in HEAVY_MODULES if m in loaded]
+            results[command] = {'wall_ms': wall * 1000, 'import_ms': total_us / 1000, 'heavy_modules': heavy,
+                                'returncode': code}
+            print(f"{command:14s} 실행 {wall * 1000:7.1f} ms  임포트 {total_us / 1000:7.1f} ms  "
+                  f"종료 코드 {code}  무거운 모듈: {', '.join(heavy) or '없음'}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    if out:
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print("결과 저장:", out)
+    if not baseline:
+        return results, []
+    if save_baseline or not os.path.exists(baseline):
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print("기준값 저장:", baseline)
+        return results, []
+    with open(baseline, encoding="utf-8") as f:
+        old = json.load(f)
+    failures = compare_startup(results, old, threshold)
+    for failure in failures:
+        print("회귀:", failure)
+    if not failures:
+        print(f"기준값 대비 새로 불러온 무거운 모듈이나 {threshold:.0%} 이상 느려진 명령 없음")
+    return results, failures
+
+def compare_startup(results, baseline, threshold):
+    # 기준값에 없던 무거운 모듈을 불러오거나 threshold 비율 이상 느려진 명령을 돌려줌
+    failures = []
+    for command, result in results.items():
+        old = baseline.get(command)
+        if not old:
+            continue
+        added = [m for m in result['heavy_modules'] if m not in old['heavy_modules']]
+        if added:
+            failures.append(f"{command} 새 모듈: {', '.join(added)}")
+        before, after = old['wall_ms'], result['wall_ms']
+        if after > before * (1 + threshold) and after - before > STARTUP_FLOOR_MS:
+            failures.append(f"{command} 실행 시간: {before:.1f} → {after:.1f} ms")
+    return failures
+
+STAGES = ["read_excel", "build_image_cache", "make_popup_html", "add_markers_to_map", "add_legend_and_controls", "save_map"]
+STAGE_FLOORS = {'seconds': 0.05, 'peak_mb': 1.0}  # 이보다 작은 차이는 측정 잡음으로 보고 회귀로 치지 않음
+
+def write_synthetic_workbook(path, rows, group_size=2, photos=0.0, photo_size=(1600, 1200), images_dir=None, seed=0):
+    # read_excel이 읽는 것과 같은 형식: 1행 제목, 2행 칼럼 이름, 3행부터 데이터
+    # photos 비율만큼 관리번호별 사진(images/{관리번호}.jpg)도 만듦
+    import openpyxl
+    columns, data = synthetic_rows(rows, group_size, seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("관리목록")
+    ws.append(["게시대 관리목록"])
+    ws.append(columns)
+    for row in data:
+        ws.append(row)
+    wb.save(path)
+    if not images_dir or photos <= 0:
+        return 0
+    from PIL import Image
+    os.makedirs(images_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    base = Image.effect_noise(photo_size, 48).convert("RGB")
+    count = 0
+    for row in data:
+        if rnd.random() >= photos:
+            continue
+        # 사진마다 한 구석을 다르게 칠해 내용 해시가 겹치지 않게 함
+        img = base.copy()
+        img.paste((count * 37 % 256, count * 91 % 256, count * 53 % 256), (0, 0, 64, 64))
+        img.save(os.path.join(images_dir, f"{row[2]}.jpg"), quality=85)
+        count += 1
+    return count
+
+def run_stages(excel_name, popup_mode=PACSmaker.POPUP_MODE, engine=PACSmaker.RENDER_ENGINE, trace=False):
+    # 현재 폴더에서 단계별로 한 번씩 실행 - trace=True면 tracemalloc으로 단계별 최대 메모리도 잼
+    import folium
+    for path in (PACSmaker.CACHE_DIR, PACSmaker.THUMBS_DIR):
+        shutil.rmtree(path, ignore_errors=True)
+    results = {}
+    state = {}
+
+    def stage(name, func):
+        if trace:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            value = func()
+        elapsed = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20 if trace else None
+        if trace:
+            tracemalloc.stop()
+        results[name] = {'seconds': elapsed, 'peak_mb': peak}
+        return value
+
+    df = stage("read_excel", lambda: PACSmaker.read_excel(excel_name))
+    images = stage("build_image_cache", lambda: PACSmaker.build_image_cache(df, PACSmaker.IMAGES_DIR, PACSmaker.THUMBS_DIR, 1))
+    stage("make_popup_html", lambda: [PACSmaker.make_popup_html(group, df, images) for _, group in df.groupby('마커번호')])
+    state['map'] = folium.Map(location=[df.iloc[0]['위도'], df.iloc[0]['경도']], zoom_start=13, tiles=None)
+    stage("add_markers_to_map", lambda: PACSmaker.add_markers_to_map(state['map'], df, images, popup_mode, engine))
+    stage("add_legend_and_controls", lambda: PACSmaker.add_legend_and_controls(state['map'], df))
+    stage("save_map", lambda: PACSmaker.save_map(state['map'], PACSmaker.FILENAME))
+    return results, os.path.getsize(PACSmaker.FILENAME)
+
+def compare_baseline(result, baseline, threshold):
+    # 기준값보다 threshold 비율 이상 느려지거나 커진 단계를 돌려줌
+    failures = []
+    for name in STAGES:
+        old = baseline['stages'].get(name)
+        if not old:
+            continue
+        for key, floor in STAGE_FLOORS.items():
+            before, after = old.get(key), result['stages'][name].get(key)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before > floor:
+                failures.append(f"{name} {key}: {before:.3f} → {after:.3f}")
+    if result['html_bytes'] > baseline['html_bytes'] * (1 + threshold):
+        failures.append(f"HTML 크기: {baseline['html_bytes']} → {result['html_bytes']}")
+    return failures
+
+def bench_stages(rows=5000, group_size=2, photos=0.2, photo_size=(1600, 1200), popup_mode=PACSmaker.POPUP_MODE,
+                 engine=PACSmaker.RENDER_ENGINE, repeat=3, workdir=None, baseline=None, save_baseline=False,
+                 threshold=0.2):
+    # 가짜 관리목록으로 단계별 시간(repeat번 중 최솟값)과 최대 메모리, 출력 HTML 크기를 재고 기준값과 비교
+    params = {'rows': rows, 'group_size': group_size, 'photos': photos, 'photo_size': list(photo_size),
+              'popup_mode': popup_mode, 'engine': engine}
+    cwd = os.getcwd()
+    baseline = os.path.abspath(baseline) if baseline else None
+    # 측정 중 thumbs/, .pacs_cache/를 지우고 관리목록.xlsx, images/를 새로 쓰므로 항상 새로 만든 하위 폴더에서 실행
+    # (--workdir . 로 실행해도 실제 사진과 엑셀은 건드리지 않음) - --workdir를 주면 끝난 뒤에도 그 하위 폴더를 남김
+    keep = bool(workdir)
+    if workdir:
+        os.makedirs(workdir, exist_ok=True)
+    workdir = os.path.abspath(tempfile.mkdtemp(prefix="pacs_bench_", dir=workdir))
+    os.chdir(workdir)
+    try:
+        excel_name = "관리목록.xlsx"
+        count = write_synthetic_workbook(excel_name, rows, group_size, photos, tuple(photo_size), PACSmaker.IMAGES_DIR)
+        print(f"가짜 관리목록: {rows}행, 사진 {count}장 ({photo_size[0]}x{photo_size[1]}) - {workdir}")
+        best = None
+        for _ in range(repeat):
+            timed, html_bytes = run_stages(excel_name, popup_mode, engine)
+            best = timed if best is None else {k: min(best[k], timed[k], key=lambda r: r['seconds']) for k in best}
+        traced, _ = run_stages(excel_name, popup_mode, engine, trace=True)
+    finally:
+        os.chdir(cwd)
+        if not keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+    stages = {name: {'seconds': best[name]['seconds'], 'peak_mb': traced[name]['peak_mb']} for name in STAGES}
+    result = {'params': params, 'stages': stages, 'html_bytes': html_bytes}
+    for name in STAGES:
+        print(f"{name:24s} {stages[name]['seconds'] * 1000:9.1f} ms  최대 {stages[name]['peak_mb']:8.1f} MB")
+    print(f"{'HTML 크기':24s} {html_bytes / 2 ** 20:9.2f} MB")
+    if not baseline:
+        return result, []
+    if save_baseline or not os.path.exists(baseline):
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print("기준값 저장:", baseline)
+        return result, []
+    with open(baseline, encoding="utf-8") as f:
+        old = json.load(f)
+    if old.get('params') != params:
+        print("경고: 기준값과 측정 조건이 다릅니다:", old.get('params'))
+    failures = compare_baseline(result, old, threshold)
+    for failure in failures:
+        print("회귀:", failure)
+    if not failures:
+        print(f"기준값 대비 {threshold:.0%} 이상 느려진 단계 없음")
+    return result, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="PACSmaker 벤치마크")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("render", help="마커 렌더링 엔진별 프레임 시간 측정 페이지 생성")
+    p.add_argument("--out", default="bench_render.html")
+    p.add_argument("--counts", type=int, nargs="+", default=RENDER_COUNTS)
+    p.add_argument("--engines", nargs="+", choices=RENDER_ENGINES, default=RENDER_ENGINES)
+    p = sub.add_parser("popup", help="팝업 HTML 생성 마이크로 벤치마크")
+    p.add_argument("--rows", type=int, default=10000)
+    p.add_argument("--repeat", type=int, default=3)
+    p = sub.add_parser("parallel", help="프로세스 수별 마커 조각 생성 시간 측정")
+    p.add_argument("--rows", type=int, default=50000)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--html", action="store_true", help="lazy 레코드 대신 html 팝업 생성")
+    p = sub.add_parser("startup", help="하위 명령을 작은 가짜 관리목록으로 실행해 시작 비용(-X importtime) 측정, 기준값과 비교")
+    p.add_argument("--commands", nargs="+", choices=STARTUP_COMMANDS, default=STARTUP_COMMANDS)
+    p.add_argument("--out", help="결과 JSON 저장 경로")
+    p.add_argument("--baseline", help="기준값 JSON 경로 (없으면 새로 저장)")
+    p.add_argument("--save-baseline", action="store_true", help="비교하지 않고 기준값을 덮어씀")
+    p.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 실행 시간 증가 비율")
+    p = sub.add_parser("stages", help="가짜 관리목록으로 단계별 시간/메모리 측정, 기준값과 비교")
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--group-size", type=int, default=2, help="마커번호 하나당 최대 게시대 수")
+    p.add_argument("--photos", type=float, default=0.2, help="사진이 있는 게시대 비율")
+    p.add_argument("--photo-size", type=int, nargs=2, default=[1600, 1200], metavar=("W", "H"))
+    p.add_argument("--popup-mode", choices=["html", "lazy"], default=PACSmaker.POPUP_MODE)
+    p.add_argument("--engine", choices=["dom", "canvas", "cluster"], default=PACSmaker.RENDER_ENGINE)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--workdir", help="이 폴더 아래 새 하위 폴더를 만들어 가짜 관리목록과 출력을 남김 (기본: 임시 폴더, 끝나면 삭제)")
+    p.add_argument("--baseline", help="기준값 JSON 경로 (없으면 새로 저장)")
+    p.add_argument("--save-baseline", action="store_true", help="비교하지 않고 기준값을 덮어씀")
+    p.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 증가 비율")
+    p.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+    if args.command == "render":
+        write_render_benchmark(args.out, args.counts, args.engines)
+    elif args.command == "popup":
+        if not bench_popup(args.rows, args.repeat):
+            sys.exit(1)
+    elif args.command == "startup":
+        _, failures = bench_startup(args.commands, args.out, args.baseline, args.save_baseline, args.threshold)
+        if failures:
+            sys.exit(1)
+    elif args.command == "stages":
+        result, failures = bench_stages(
+            args.rows, args.group_size, args.photos, args.photo_size, args.popup_mode, args.engine,
+            args.repeat, args.workdir, args.baseline, args.save_baseline, args.threshold,
+        )
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        if failures:
+            sys.exit(1)
+    elif args.command == "parallel":
+        if not bench_parallel(args.rows, args.workers, not args.html):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
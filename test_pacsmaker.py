@@ -0,0 +1,544 @@
+import base64
+import contextlib
+import hashlib
+import http.server
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import PACSmaker
+from benchmark import synthetic_frame, write_synthetic_workbook
+
+class FakeRepo:
+    # publish_files가 쓰는 PyGithub Repository 메서드만 흉내 낸 메모리 저장소
+    default_branch = "main"
+
+    def __init__(self):
+        self.blobs = {}
+        self.trees = {}
+        self.commits = {}
+        self.uploads = []
+        empty = self.save_tree({})
+        self.head = self.save_commit(empty)
+
+    def save_tree(self, entries):
+        sha = hashlib.sha1(json.dumps(sorted(entries.items())).encode()).hexdigest()
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def save_commit(self, tree_sha):
+        sha = hashlib.sha1(f"{tree_sha}:{len(self.commits)}".encode()).hexdigest()
+        self.commits[sha] = tree_sha
+        return sha
+
+    def files(self):
+        return {path: self.blobs[sha] for path, sha in self.trees[self.commits[self.head]].items()}
+
+    def get_git_ref(self, name):
+        assert name == f"heads/{self.default_branch}"
+        ref = SimpleNamespace(object=SimpleNamespace(sha=self.head))
+        ref.edit = lambda sha: setattr(self, 'head', sha)
+        return ref
+
+    def get_git_commit(self, sha):
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(sha=self.commits[sha]))
+
+    def get_git_tree(self, sha, recursive=False):
+        entries = [SimpleNamespace(path=path, sha=blob, type="blob") for path, blob in self.trees[sha].items()]
+        return SimpleNamespace(sha=sha, tree=entries)
+
+    def create_git_blob(self, content, encoding):
+        data = base64.b64decode(content)
+        sha = PACSmaker.git_blob_sha(data)
+        self.blobs[sha] = data
+        self.uploads.append(sha)
+        return SimpleNamespace(sha=sha)
+
+    def create_git_tree(self, elements, base_tree):
+        entries = dict(self.trees[base_tree.sha])
+        entries.update((e.path, e.sha) for e in elements)
+        return SimpleNamespace(sha=self.save_tree(entries))
+
+    def create_git_commit(self, message, tree, parents):
+        return SimpleNamespace(sha=self.save_commit(tree.sha))
+
+def tree_element(path, mode, type, sha):
+    return SimpleNamespace(path=path, mode=mode, type=type, sha=sha)
+
+class PublishTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        os.makedirs(os.path.join(self.dir, "sub", "thumbs"))
+        self.write("sub/PACS.html", b"<html>1</html>")
+        self.write("sub/thumbs/a_t.jpg", b"jpg-a")
+        self.write("list.xlsx", b"xlsx")
+        # 지난 빌드가 남긴 썸네일과 타일 데이터 - 이번 빌드 출력이 아니므로 올리면 안 됨
+        os.makedirs(os.path.join(self.dir, "sub", "PACS_data", "tiles"))
+        self.write("sub/thumbs/old_t.jpg", b"jpg-old")
+        self.write("sub/PACS_data/tiles/0_0.json", b"[]")
+        self.outputs = [os.path.join(self.dir, "sub", "PACS.html"), os.path.join(self.dir, "sub", "thumbs", "a_t.jpg")]
+        self.repo = FakeRepo()
+
+    def write(self, name, data):
+        with open(os.path.join(self.dir, name), "wb") as f:
+            f.write(data)
+
+    def publish(self):
+        files = PACSmaker.publish_list(os.path.join(self.dir, "sub", "PACS.html"), os.path.join(self.dir, "list.xlsx"),
+                                       self.outputs, base=self.dir)
+        return PACSmaker.publish_files(self.repo, files, tree_element=tree_element)
+
+    def test_uploads_only_changed_files(self):
+        self.assertIsNotNone(self.publish())
+        self.assertEqual(self.repo.files(), {
+            "sub/PACS.html": b"<html>1</html>", "sub/thumbs/a_t.jpg": b"jpg-a", "list.xlsx": b"xlsx",
+        })
+        self.assertEqual(len(self.repo.uploads), 3)
+
+        head = self.repo.head
+        self.assertIsNone(self.publish())
+        self.assertEqual(self.repo.head, head)
+        self.assertEqual(len(self.repo.uploads), 3)
+
+        self.write("sub/PACS.html", b"<html>2</html>")
+        self.assertIsNotNone(self.publish())
+        self.assertEqual(len(self.repo.uploads), 4)
+        self.assertEqual(self.repo.files()["sub/PACS.html"], b"<html>2</html>")
+        self.assertEqual(self.repo.files()["sub/thumbs/a_t.jpg"], b"jpg-a")
+
+    def test_uses_outputs_recorded_by_build(self):
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        self.addCleanup(os.chdir, cwd)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(set(PACSmaker.publish_list("sub/PACS.html", "list.xlsx")), {"sub/PACS.html", "list.xlsx"})
+        outputs = ["sub/PACS.html", "sub/thumbs/a_t.jpg"]
+        PACSmaker.save_build_cache({'fingerprint': "x", 'outputs': outputs, 'fragments': PACSmaker.FragmentStore()},
+                                   "sub/PACS.html")
+        self.assertEqual(PACSmaker.publish_list("sub/PACS.html", "list.xlsx"),
+                         {"sub/PACS.html": "sub/PACS.html", "sub/thumbs/a_t.jpg": "sub/thumbs/a_t.jpg", "list.xlsx": "list.xlsx"})
+
+    def test_rejects_path_outside_base(self):
+        with self.assertRaises(SystemExit):
+            PACSmaker.remote_path(os.path.join(self.dir, "..", "other.html"), self.dir)
+
+class TileServer(http.server.ThreadingHTTPServer):
+    # 배경지도 원본 대신 쓰는 로컬 타일 서버: 요청 수를 세고, 지연/실패를 흉내 냄
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), TileHandler)
+        self.hits = {}
+        self.delay = 0
+        self.fail = False
+        self.lock = threading.Lock()
+
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/{{z}}/{{x}}/{{y}}"
+
+class TileHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server.lock:
+            self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        time.sleep(self.server.delay)
+        if self.server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = self.path.encode().ljust(1000, b".")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.server = TileServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def cache(self, ttl=60, cache_mb=1):
+        import requests
+        layer = {'key': 't', 'url': self.server.url(), 'ttl': ttl, 'cache_mb': cache_mb}
+        return PACSmaker.TileCache(self.dir, [layer], session=requests.Session())
+
+    def test_ttl_and_stale_fallback(self):
+        cache = self.cache()
+        data = cache.get('t', 1, 2, 3)
+        self.assertTrue(data.startswith(b"/1/2/3"))
+        self.assertEqual(cache.get('t', 1, 2, 3), data)
+        self.assertEqual(self.server.hits["/1/2/3"], 1)
+
+        old = time.time() - 120
+        os.utime(cache.path('t', 1, 2, 3), (old, old))
+        self.assertEqual(cache.get('t', 1, 2, 3), data)
+        self.assertEqual(self.server.hits["/1/2/3"], 2)
+
+        os.utime(cache.path('t', 1, 2, 3), (old, old))
+        self.server.fail = True
+        self.assertEqual(cache.get('t', 1, 2, 3), data)
+        self.assertIsNone(cache.get('t', 1, 2, 4))
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = self.cache(cache_mb=2500 / 2 ** 20)
+        cache.get('t', 1, 0, 0)
+        cache.get('t', 1, 0, 1)
+        cache.get('t', 1, 0, 0)
+        cache.get('t', 1, 0, 2)
+        self.assertTrue(os.path.exists(cache.path('t', 1, 0, 0)))
+        self.assertFalse(os.path.exists(cache.path('t', 1, 0, 1)))
+        self.assertTrue(os.path.exists(cache.path('t', 1, 0, 2)))
+        self.assertEqual(cache.used['t'], 2000)
+
+    def test_untracked_tile_counts_toward_used(self):
+        # 캐시를 연 뒤에 다른 프로세스가 쓴 타일도 읽을 때 용량에 더함
+        cache = self.cache()
+        path = cache.path('t', 2, 0, 0)
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"x" * 700)
+        self.assertEqual(cache.get('t', 2, 0, 0), b"x" * 700)
+        cache.get('t', 2, 0, 0)
+        self.assertEqual(cache.used['t'], 700)
+        cache.get('t', 2, 0, 1)
+        self.assertEqual(cache.used['t'], sum(cache.lru['t'].values()))
+        self.assertEqual(cache.used['t'], 1700)
+
+    def test_tile_removed_before_read_is_fetched(self):
+        cache = self.cache()
+        data = cache.get('t', 3, 4, 5)
+        path = cache.path('t', 3, 4, 5)
+        stat = os.stat
+        removed = []
+
+        def stat_then_remove(name, *args, **kwargs):
+            # stat은 새 타일로 보이지만 읽기 전에 다른 요청이 용량 제한으로 지운 경우
+            st = stat(name, *args, **kwargs)
+            if name == path and not removed:
+                removed.append(name)
+                os.remove(path)
+            return st
+
+        with mock.patch.object(PACSmaker.os, "stat", stat_then_remove):
+            self.assertEqual(cache.get('t', 3, 4, 5), data)
+        self.assertEqual(self.server.hits["/3/4/5"], 2)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(cache.used['t'], sum(cache.lru['t'].values()))
+
+    def test_concurrent_requests_fetch_once(self):
+        cache = self.cache()
+        self.server.delay = 0.3
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('t', 5, 6, 7))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(self.server.hits["/5/6/7"], 1)
+        self.assertEqual(len(results), 8)
+        self.assertEqual(len(set(results)), 1)
+
+def run_js(script, expr):
+    # 페이지 스크립트를 node로 실행하고 expr 값을 JSON으로 받음 (브라우저 객체는 빈 껍데기)
+    code = f"var window = globalThis, document = {{addEventListener: function() {{}}}};\n{script}\nconsole.log(JSON.stringify({expr}));"
+    out = subprocess.run(["node", "-e", code], capture_output=True, text=True, encoding="utf-8", check=True).stdout
+    return json.loads(out)
+
+@unittest.skipIf(shutil.which("node") is None, "node가 없어 페이지 스크립트를 실행할 수 없음")
+class PageScriptTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.df = synthetic_frame(600)
+        cls.index = PACSmaker.build_search_index(cls.df)
+        cls.near = PACSmaker.build_spatial_index(cls.df)
+        cls.script = (
+            f"var PACS_INDEX = {PACSmaker.to_js_json(cls.index)};\n"
+            f"var PACS_NEAR = {PACSmaker.to_js_json(cls.near)};\n"
+            f"{PACSmaker.SEARCH_JS}{PACSmaker.NEARBY_JS}"
+        )
+
+    def test_search_matches_brute_force(self):
+        queries = ["마포", "강남구 1", "12", "1-2", "번지 앞", "x", ""]
+        results = run_js(self.script, f"{json.dumps(queries)}.map(pacsSearch)")
+        texts = self.index['text']
+        numbers = [self.df['관리번호'].iloc[rows].map(str).tolist() for rows in PACSmaker.marker_groups(self.df).values()]
+        for q, got in zip(queries, results):
+            if not q:
+                expected = None
+            elif q.isdigit():
+                expected = [i for i, ids in enumerate(numbers) if any(n == q or n.startswith(q + "-") for n in ids)]
+            else:
+                expected = [i for i, text in enumerate(texts) if q.lower() in text]
+            self.assertEqual(got, expected, q)
+
+    def test_nearby_matches_brute_force(self):
+        points = [(37.55, 127.0, 20, 3000), (37.5, 126.9, 5, 3000), (37.6, 127.1, 50, 2500), (37.55, 127.0, 10, 400), (36.0, 127.0, 20, 1000)]
+        calls = ", ".join(f"pacsNearby({lat}, {lon}, {k}, {radius})" for lat, lon, k, radius in points)
+        results = run_js(self.script, f"[{calls}]")
+        for (lat, lon, k, radius), got in zip(points, results):
+            dists = [
+                (PACSmaker.distance_m(lat, lon, a / 1e6, b / 1e6), i)
+                for i, (a, b) in enumerate(zip(self.near['lat'], self.near['lon']))
+            ]
+            expected = [i for d, i in sorted(dists) if d <= radius][:k]
+            self.assertEqual([i for i, _ in got], expected)
+
+class StreamOutputTest(unittest.TestCase):
+    # save_map의 스트리밍 저장은 branca 내부(figure.script._children, marker._id 등)에 기대므로
+    # 그냥 m.save() 한 결과와 같은지 확인 (무작위 id와 작성 시각만 빼고 비교)
+    def setUp(self):
+        cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(os.chdir, cwd)
+        self.df = synthetic_frame(300)
+
+    def render(self, popup_mode, stream, workers, cache=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            m = PACSmaker.make_map(self.df, {}, popup_mode, cache=cache, workers=workers, stream=stream)
+            PACSmaker.add_legend_and_controls(m, self.df)
+            PACSmaker.add_custom_js_css(m)
+            PACSmaker.save_map(m, "out.html")
+        with open("out.html", encoding="utf-8") as f:
+            html = f.read()
+        self.assertNotIn("PACS_STREAM", html)
+        return re.sub(r"[0-9a-f]{32}", "X", re.sub(r"작성시점 : [^<]*", "", html))
+
+    def test_streamed_save_matches_plain_save(self):
+        # PARALLEL_MIN_GROUPS를 낮춰 workers=2일 때 실제로 프로세스 풀을 거치게 함
+        with mock.patch.object(PACSmaker, "PARALLEL_MIN_GROUPS", 10):
+            for popup_mode in ("lazy", "html"):
+                expected = self.render(popup_mode, False, 1)
+                for workers in (1, 2):
+                    for stream in (False, True):
+                        with self.subTest(popup_mode=popup_mode, workers=workers, stream=stream):
+                            self.assertEqual(self.render(popup_mode, stream, workers), expected)
+                    with self.subTest(popup_mode=popup_mode, workers=workers, cache=True):
+                        store = PACSmaker.FragmentStore()
+                        self.assertEqual(self.render(popup_mode, True, workers, store), expected)
+                        self.assertEqual(self.render(popup_mode, True, workers, store), expected)
+                        store.close()
+
+class BuildCacheTest(unittest.TestCase):
+    # build()는 입력이 같으면 HTML을 다시 쓰지 않고, 바뀐 마커 그룹만 다시 만듦
+    def setUp(self):
+        cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(os.chdir, cwd)
+        self.photos = write_synthetic_workbook("list.xlsx", 40, photos=0.3, photo_size=(64, 48), images_dir="images")
+        self.assertTrue(self.build())
+
+    def build(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            changed = PACSmaker.build("list.xlsx", "out.html", workers=1)
+        self.output = out.getvalue()
+        return changed
+
+    def html(self):
+        with open("out.html", "rb") as f:
+            return f.read(), os.stat("out.html").st_mtime_ns
+
+    def test_unchanged_rerun_leaves_html_alone(self):
+        before = self.html()
+        self.assertFalse(self.build())
+        self.assertEqual(self.html(), before)
+
+    def test_changed_row_rerenders_one_group(self):
+        import openpyxl
+        wb = openpyxl.load_workbook("list.xlsx")
+        ws = wb.active
+        ws.cell(row=10, column=4).value = "서울시 중구 바뀐 주소"
+        wb.save("list.xlsx")
+        groups = len(PACSmaker.marker_groups(PACSmaker.read_excel("list.xlsx")))
+        self.assertTrue(self.build())
+        self.assertIn(f"마커 {groups}개 중 1개를 새로 만들었습니다.", self.output)
+        self.assertIn("서울시 중구 바뀐 주소", self.html()[0].decode("utf-8"))
+
+    def test_deleted_thumbnail_forces_rebuild(self):
+        thumbs = sorted(os.listdir(PACSmaker.THUMBS_DIR))
+        self.assertTrue(self.photos and thumbs)
+        os.remove(os.path.join(PACSmaker.THUMBS_DIR, thumbs[0]))
+        self.assertTrue(self.build())
+        self.assertEqual(sorted(os.listdir(PACSmaker.THUMBS_DIR)), thumbs)
+        self.assertFalse(self.build())
+
+class ReadExcelTest(unittest.TestCase):
+    ROWS = [
+        ["게시대 관리목록"],
+        ["순번", "관리번호", "설치장소", "단수", "위도", "경도", "관리부서"],
+        [1, "1", "중구 1번지", 2, 37.5, 127.0, "도시과"],
+        [2, "2", "중구 2번지", 1.5, "37.6", 127.1, "건설과"],
+        [3, "3", "중구 3번지", "두", 37.7, 127.2, "도시과"],
+        [4, "4", None, 1, 37.8, 127.3, "도시과"],
+        [5, "5", "중구 5번지", 1, "위도 없음", 127.4, "도시과"],
+        [6, "6", "중구 6번지", None, 37.9, 127.5, None],
+    ]
+
+    def setUp(self):
+        cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        os.chdir(self.dir)
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(os.chdir, cwd)
+        import openpyxl
+        wb = openpyxl.Workbook()
+        for row in self.ROWS:
+            wb.active.append(row)
+        wb.save("list.xlsx")
+
+    def read(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return PACSmaker.read_excel("list.xlsx")
+
+    def test_typed_columns(self):
+        df = self.read()
+        self.assertEqual(df['관리번호'].tolist(), ["1", "2", "3", "6"])
+        self.assertEqual(str(df['위도'].dtype), "float64")
+        self.assertEqual(df['위도'].tolist(), [37.5, 37.6, 37.7, 37.9])
+        self.assertEqual(str(df['단수'].dtype), "Int64")
+        self.assertEqual(df['단수'].isna().tolist(), [False, True, True, True])
+        self.assertEqual(df['단수'].iloc[0], 2)
+        self.assertEqual(str(df['관리부서'].dtype), "category")
+
+    def test_wrong_dimension(self):
+        # 다른 프로그램이 <dimension ref="A1"/>로 저장한 파일 - 읽기 전용 모드가 이 값을 믿으면 첫 행만 읽음
+        import zipfile
+        with zipfile.ZipFile("list.xlsx") as z:
+            parts = {name: z.read(name) for name in z.namelist()}
+        sheet = "xl/worksheets/sheet1.xml"
+        parts[sheet], count = re.subn(rb'<dimension ref="[^"]*"\s*/>', b'<dimension ref="A1"/>', parts[sheet])
+        self.assertEqual(count, 1)
+        with zipfile.ZipFile("list.xlsx", "w") as z:
+            for name, data in parts.items():
+                z.writestr(name, data)
+        import openpyxl
+        wb = openpyxl.load_workbook("list.xlsx", read_only=True)
+        self.assertEqual(wb.active.max_row, 1)
+        wb.close()
+        self.assertEqual(self.read()['관리번호'].tolist(), ["1", "2", "3", "6"])
+
+    def test_snapshot_reused_when_only_mtime_changes(self):
+        df = self.read()
+        st = os.stat("list.xlsx")
+        os.utime("list.xlsx", ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        with mock.patch.object(PACSmaker, "parse_excel", side_effect=AssertionError("다시 파싱함")):
+            cached = self.read()
+        self.assertTrue(cached.equals(df))
+
+    def test_snapshot_dropped_when_parser_changes(self):
+        self.read()
+        with mock.patch.object(PACSmaker, "parse_excel", wraps=PACSmaker.parse_excel) as parse:
+            self.read()
+            self.assertEqual(parse.call_count, 0)
+            with mock.patch.object(PACSmaker, "PARSER_VERSION", PACSmaker.PARSER_VERSION + 1):
+                self.read()
+                self.assertEqual(parse.call_count, 1)
+                self.read()
+                self.assertEqual(parse.call_count, 1)
+
+def js_syntax_errors(scripts):
+    # 스크립트마다 node로 문법만 확인 (실행하지 않음) - 문법 오류가 난 것의 번호와 메시지
+    code = (
+        "var scripts = JSON.parse(require('fs').readFileSync(0, 'utf8')), errors = [];\n"
+        "scripts.forEach(function(s, i) { try { new Function(s); } catch (e) { errors.push([i, String(e)]); } });\n"
+        "console.log(JSON.stringify(errors));"
+    )
+    out = subprocess.run(["node", "-e", code], input=json.dumps(scripts), capture_output=True, text=True,
+                         encoding="utf-8", check=True).stdout
+    return json.loads(out)
+
+def inline_scripts(html):
+    return [body for attrs, body in re.findall(r"<script\b([^>]*)>(.*?)</script>", html, re.S) if "src=" not in attrs]
+
+class OptimizeTest(unittest.TestCase):
+    @unittest.skipIf(shutil.which("node") is None, "node가 없어 페이지 스크립트를 확인할 수 없음")
+    def test_optimized_pages_still_parse(self):
+        df = synthetic_frame(120)
+        for engine in ("dom", "canvas", "cluster"):
+            for popup_mode in ("lazy", "html"):
+                with self.subTest(engine=engine, popup_mode=popup_mode):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        m = PACSmaker.make_map(df, {}, popup_mode, engine, workers=1)
+                        PACSmaker.add_legend_and_controls(m, df)
+                        PACSmaker.add_custom_js_css(m)
+                    html = m.get_root().render()
+                    optimized = PACSmaker.minify_html(PACSmaker.dedupe_inline_styles(html))
+                    self.assertIn(".ps0{", optimized)
+                    self.assertLess(len(optimized), len(html))
+                    before, after = inline_scripts(html), inline_scripts(optimized)
+                    self.assertEqual(len(after), len(before))
+                    self.assertEqual(js_syntax_errors(before), [])
+                    self.assertEqual(js_syntax_errors(after), [])
+
+    def test_class_attributes_merge(self):
+        style = "color: red; width: 10px"
+        html = (
+            "<html><head></head><body>\n"
+            f"<div class=\"a\" style=\"{style}\">1</div>\n"
+            f"<div style=\"{style}\" class=\"b c\">2</div>\n"
+            f"<script>var s = '<i class=\\'d\\' style=\\'{style}\\'>3</i>';</script>\n"
+            f"<script>var t = \"<b style=\\\"{style}\\\" class=\\\"e\\\">4</b>\";</script>\n"
+            "</body></html>"
+        )
+        out = PACSmaker.dedupe_inline_styles(html)
+        self.assertIn(f"<style>.ps0{{{style}}}</style>", out)
+        self.assertNotIn("style=", out.split("</head>", 1)[1])
+        self.assertIn("<div class=\"a ps0\">1</div>", out)
+        self.assertIn("<div class=\"ps0 b c\">2</div>", out)
+        self.assertIn("<i class=\\'d ps0\\'>3</i>", out)
+        self.assertIn("<b class=\\\"ps0 e\\\">4</b>", out)
+
+    def test_concatenated_styles_untouched(self):
+        # JS에서 이어 붙여 만드는 style은 값이 실행할 때 정해지므로 클래스로 바꾸면 안 됨
+        body = "\n".join([
+            "<script>",
+            "var a = '<div style=\"background:' + color + '; width: 10px\">';",
+            "var b = \"<div style='background:\" + color + \"; width: 10px'>\";",
+            "var c = '<div style=\\'background: ' + color + '\\'>';",
+            "var d = \"<div style=\\\"width: 10px; color: \" + color + \"\\\">\";",
+            "var e = '<div style=\"' + css + '\">';",
+            "var f = \"<div style='width: 10px; height: \" + h + \"px'>\";",
+            "</script>",
+        ])
+        html = f"<html><head></head><body>\n{body}\n{body}\n{body}\n</body></html>"
+        self.assertEqual(PACSmaker.dedupe_inline_styles(html), html)
+
+class SearchIndexTest(unittest.TestCase):
+    def test_same_bytes_for_any_hash_seed(self):
+        # 색인이 실행마다 달라지면 summary.json과 HTML이 매번 바뀐 것으로 보여 다시 쓰고 다시 올림
+        code = (
+            "import PACSmaker, benchmark\n"
+            "print(PACSmaker.to_js_json(PACSmaker.build_search_index(benchmark.synthetic_frame(300))))"
+        )
+        here = os.path.dirname(os.path.abspath(__file__))
+        outputs = {
+            subprocess.run([sys.executable, "-c", code], cwd=here, capture_output=True, text=True, encoding="utf-8",
+                           check=True, env=dict(os.environ, PYTHONHASHSEED=seed)).stdout
+            for seed in ("1", "2", "3")
+        }
+        self.assertEqual(len(outputs), 1)
+
+if __name__ == "__main__":
+    unittest.main()